@@ -0,0 +1,175 @@
+"""Load and latency benchmark of ExtendSwitch under synthetic press streams."""
+import asyncio
+import random
+import threading
+import time
+import tracemalloc
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+
+from custom_components.extend_switch import const
+from custom_components.extend_switch.const import (
+    CONF_ADD_ANODHER, CONF_NAME, CONF_PUSH_MAX, CONF_PUSH_WAIT_TIME, CONF_SWITCH_ENTITY, DOMAIN,
+)
+
+# bench_memory.py also runs this file against versions from before the batching window
+DEFAULT_AUTO_OFF_WINDOW = getattr(const, "DEFAULT_AUTO_OFF_WINDOW", 0)
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def _summary(values):
+    return {
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+async def _async_create_switches(hass, count, wait):
+    """Create count switches through the config and options flows."""
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {})
+    entry = result["result"]
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_ADD_ANODHER: True})
+    for i in range(count):
+        result = await hass.config_entries.options.async_configure(result["flow_id"], {
+            CONF_SWITCH_ENTITY: "switch.bench_{}".format(i),
+            CONF_NAME: "bench {}".format(i),
+            CONF_PUSH_WAIT_TIME: wait,
+            CONF_PUSH_MAX: 10,
+            CONF_ADD_ANODHER: i < count - 1,
+        })
+    await hass.async_block_till_done()
+    return entry
+
+
+def _press_schedule(sources, gestures, press_rate, wait):
+    """Return (time, source) presses, gestures of one source never overlap."""
+    rng = random.Random(1)
+    busy_until = dict.fromkeys(sources, 0.0)
+    presses = []
+    t = 0.0
+    for _ in range(gestures):
+        source = rng.choice(sources)
+        start = max(t, busy_until[source])
+        press_time = start
+        for press in range(rng.choice((1, 1, 1, 2, 2, 3))):
+            if press:
+                press_time += rng.uniform(0.2, 0.5) * wait
+            presses.append((press_time, source))
+            t += 1 / press_rate
+        # the window closes and the source is turned back off
+        busy_until[source] = press_time + wait * 2 + DEFAULT_AUTO_OFF_WINDOW / 1000
+    presses.sort()
+    return presses
+
+
+async def bench_press_stream(hass, request, switch_count, bench_results):
+    """Replay presses on switch_count switches and record latency and load."""
+    wait = request.config.getoption("wait")
+    gestures = request.config.getoption("gestures")
+    press_rate = request.config.getoption("press_rate")
+
+    assert await async_setup_component(hass, "homeassistant", {})
+    sources = ["switch.bench_{}".format(i) for i in range(switch_count)]
+    for source in sources:
+        hass.states.async_set(source, "off")
+
+    service_calls = []
+
+    async def async_turn_off(call):
+        service_calls.append(call)
+        for entity_id in call.data["entity_id"]:
+            hass.states.async_set(entity_id, "off", context=call.context)
+
+    hass.services.async_register("switch", "turn_off", async_turn_off)
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    setup_started = time.perf_counter()
+    entry = await _async_create_switches(hass, switch_count, wait)
+    setup_time = time.perf_counter() - setup_started
+    memory_per_entity = (tracemalloc.get_traced_memory()[0] - memory_before) / switch_count
+    tracemalloc.stop()
+
+    source_of = {}
+    for reg_entry in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id):
+        if reg_entry.domain == "number":
+            state = hass.states.get(reg_entry.entity_id)
+            source_of[reg_entry.entity_id] = state.attributes["original entity id"]
+    assert len(source_of) == switch_count
+
+    last_press = {}
+    latencies = []
+    writes = 0
+
+    @callback
+    def _async_state_changed(event):
+        nonlocal writes
+        source = source_of.get(event.data["entity_id"])
+        if source is None:
+            return
+        writes += 1
+        new_state = event.data["new_state"]
+        try:
+            value = float(new_state.state)
+        except (AttributeError, ValueError):
+            return
+        if value:
+            latencies.append(time.monotonic() - last_press[source])
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _async_state_changed)
+    threads_before = threading.active_count()
+    presses = _press_schedule(sources, gestures, press_rate, wait / 1000)
+    calls_before = len(service_calls)
+
+    started = time.monotonic()
+    for press_time, source in presses:
+        delay = started + press_time - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        last_press[source] = time.monotonic()
+        hass.states.async_set(source, "off" if hass.states.get(source).state == "on" else "on")
+    await asyncio.sleep(wait / 1000 * 2 + DEFAULT_AUTO_OFF_WINDOW / 1000)
+    await hass.async_block_till_done()
+    elapsed = time.monotonic() - started
+    threads_after = threading.active_count()
+    unsub()
+
+    emitted = len(latencies)
+    result = {
+        "switches": switch_count,
+        "gestures": gestures,
+        "presses": len(presses),
+        "press_rate": press_rate,
+        "push_wait_time_ms": wait,
+        "setup_ms_per_switch": setup_time * 1000 / switch_count,
+        "emitted_gestures": emitted,
+        "gestures_per_second": emitted / elapsed,
+        "latency_ms": _summary([latency * 1000 for latency in latencies]),
+        "overhead_ms": _summary([latency * 1000 - wait for latency in latencies]),
+        "state_writes_per_gesture": writes / emitted if emitted else None,
+        "service_calls_per_gesture":
+            (len(service_calls) - calls_before) / emitted if emitted else None,
+        "threads_started": threads_after - threads_before,
+        "memory_bytes_per_entity": memory_per_entity,
+    }
+    bench_results.append(result)
+    print(result)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
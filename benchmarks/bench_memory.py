@@ -0,0 +1,66 @@
+"""Compare the memory per switch of two versions, as measured by bench_load.py.
+
+Each revision is checked out in a temporary git worktree, the current
+benchmarks are copied into it (older revisions have none) and bench_load.py
+runs there; its memory_bytes_per_entity, the bytes traced while the switches
+are created through the flows, is reported side by side.
+
+Needs pytest-homeassistant-custom-component, like bench_load.py.
+
+Usage: python benchmarks/bench_memory.py BEFORE [AFTER] [--switches 100,1000]
+    python benchmarks/bench_memory.py baseline-commit HEAD --switches 100,1000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_BENCHMARKS)
+
+
+def measure(revision, switches, gestures):
+    """Return {switch count: memory_bytes_per_entity} of bench_load.py at revision."""
+    workdir = tempfile.mkdtemp(prefix="extend_switch_bench_")
+    tree = os.path.join(workdir, "tree")
+    subprocess.run(["git", "-C", _ROOT, "worktree", "add", "--detach", tree, revision],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        benchmarks = os.path.join(tree, "benchmarks")
+        shutil.rmtree(benchmarks, ignore_errors=True)
+        shutil.copytree(_BENCHMARKS, benchmarks,
+                        ignore=shutil.ignore_patterns("__pycache__", "*.json"))
+        output = os.path.join(workdir, "results.json")
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "bench_load.py", "--switches", switches,
+             "--gestures", str(gestures), "--json", output],
+            cwd=benchmarks, check=True)
+        with open(output) as results:
+            runs = json.load(results)["runs"]
+        return {run["switches"]: run["memory_bytes_per_entity"] for run in runs}
+    finally:
+        subprocess.run(["git", "-C", _ROOT, "worktree", "remove", "--force", tree], check=False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("before", help="git revision measured first, e.g. the baseline")
+    parser.add_argument("after", nargs="?", default="HEAD", help="git revision compared to it")
+    parser.add_argument("--switches", default="100,1000", help="comma separated switch counts")
+    parser.add_argument("--gestures", type=int, default=50, help="gestures replayed per run")
+    args = parser.parse_args(argv)
+
+    before = measure(args.before, args.switches, args.gestures)
+    after = measure(args.after, args.switches, args.gestures)
+    for count in sorted(before):
+        print("{:>7} switches: {} {:7.0f} B/switch, {} {:7.0f} B/switch ({:+.0%})".format(
+            count, args.before, before[count], args.after, after[count],
+            after[count] / before[count] - 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Time the entity lookup behind the Extend Switch options dialog.
+
+Usage: python benchmarks/bench_options_index.py [switches ...]
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.extend_switch.config_flow import _index_switch_entities  # noqa: E402
+from custom_components.extend_switch.const import (  # noqa: E402
+    CONF_NAME, CONF_PUSH_MAX, CONF_PUSH_WAIT_TIME, CONF_SWITCH_ENTITY, CONF_UNIQUE_ID,
+)
+
+
+def build(count):
+    """Return count switches and registry entries, half of them legacy, some sharing a name."""
+    switches = []
+    entities = []
+    for i in range(count):
+        name = "switch {}".format(i // 2 if i % 10 == 0 else i)
+        host = {
+            CONF_SWITCH_ENTITY: "switch.source_{}".format(i),
+            CONF_NAME: name,
+            CONF_PUSH_WAIT_TIME: 1000,
+            CONF_PUSH_MAX: 10,
+        }
+        unique_id = "uid_{}".format(i)
+        if i % 2:
+            host[CONF_UNIQUE_ID] = unique_id
+        switches.append(host)
+        entities.append(SimpleNamespace(
+            entity_id="number.extend_switch_{}".format(i), unique_id=unique_id, original_name=name))
+    return switches, entities
+
+
+def main(sizes):
+    for count in sizes:
+        switches, entities = build(count)
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            resolved = _index_switch_entities(switches, entities)
+        elapsed = (time.perf_counter() - start) / runs
+        assert len(resolved) == count
+        print("{:>6} switches : {:8.3f} ms".format(count, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,42 @@
+"""Measure the offline replay throughput of tools/replay.py.
+
+Usage: python benchmarks/bench_replay.py [events ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tools"))
+
+from replay import replay  # noqa: E402
+
+
+def build(count):
+    """Return count toggles of single, double and triple presses, seconds apart."""
+    rng = random.Random(1)
+    toggles = []
+    t = 1700000000.0
+    state = "off"
+    while len(toggles) < count:
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            t += rng.uniform(0.15, 0.45)
+            state = "on" if state == "off" else "off"
+            toggles.append((t, state))
+        t += rng.uniform(2, 60)
+    return toggles
+
+
+def main(sizes):
+    for count in sizes:
+        toggles = build(count)
+        for adaptive in (False, True):
+            started = time.perf_counter()
+            replay("switch.bench", toggles, 500, 3, adaptive=adaptive)
+            elapsed = time.perf_counter() - started
+            print("{:>9} events{}: {:10.0f} events/s".format(
+                count, " adaptive" if adaptive else "", count / elapsed))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100000, 1000000])
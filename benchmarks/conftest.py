@@ -0,0 +1,43 @@
+"""Fixtures and options of the Extend Switch benchmark suite."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("extend_switch benchmarks")
+    group.addoption("--switches", default="10,100", help="comma separated switch counts")
+    group.addoption("--press-rate", type=float, default=50.0,
+                    help="presses per second over all switches")
+    group.addoption("--gestures", type=int, default=200, help="gestures replayed per run")
+    group.addoption("--wait", type=int, default=200, help="push_wait_time in milliseconds")
+    group.addoption("--json", default="bench_results.json", help="file the results are written to")
+
+
+def pytest_generate_tests(metafunc):
+    if "switch_count" in metafunc.fixturenames:
+        counts = [int(count) for count in metafunc.config.getoption("switches").split(",")]
+        metafunc.parametrize("switch_count", counts)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture(scope="session")
+def bench_results(request):
+    """Collect the results of every run and write them to the JSON file."""
+    results = []
+    yield results
+    import json
+    from custom_components.extend_switch.const import VERSION
+
+    with open(request.config.getoption("json"), "w") as output:
+        json.dump({"version": VERSION, "runs": results}, output, indent=2)
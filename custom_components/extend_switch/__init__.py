@@ -5,14 +5,26 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN, DATA_SCHEDULER, DATA_AUTO_OFF, DATA_SOURCES, DATA_ECHO, DATA_PRESS_INDEX,
+    DATA_SHARED_SOURCES,
+    CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW, CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY,
+    CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE
+)
+from .scheduler import PressScheduler
+from .auto_off import AutoOffDispatcher
+from .sources import SourceDispatcher, SharedSources
+from .reconcile import IdleReconciler
+from .echo import EchoContexts
+from .snapshot import async_setup_snapshot
+from .press_index import PressIndex
 
 
 _LOGGER = logging.getLogger(__name__)
 
 # List of platforms to support. There should be a matching .py file for each,
 # eg <cover.py> and <sensor.py>
-PLATFORMS = ["number"]
+PLATFORMS = ["number", "sensor", "event"]
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
@@ -21,6 +33,24 @@ async def async_setup(hass: HomeAssistant, config: dict):
     # common/preferred as it allows a separate instance of your class for each
     # instance that has been created in the UI.
     hass.data.setdefault(DOMAIN, {})
+    # One event loop scheduler drives the reset timers of every switch.
+    hass.data[DOMAIN].setdefault(DATA_SCHEDULER, PressScheduler(hass))
+    # Contexts of our own turn offs, their state changes are echoes.
+    hass.data[DOMAIN].setdefault(DATA_ECHO, EchoContexts(hass))
+    # Turn offs of all switches are batched by a single dispatcher.
+    hass.data[DOMAIN].setdefault(
+        DATA_AUTO_OFF, AutoOffDispatcher(hass, hass.data[DOMAIN][DATA_ECHO]))
+    # A single state_changed subscription feeds the switches of every entry.
+    hass.data[DOMAIN].setdefault(DATA_SOURCES, SourceDispatcher(hass))
+    # Each source is decoded once for all the switches using it, in any entry.
+    hass.data[DOMAIN].setdefault(DATA_SHARED_SOURCES, SharedSources(
+        hass, hass.data[DOMAIN][DATA_SOURCES], hass.data[DOMAIN][DATA_ECHO],
+        hass.data[DOMAIN][DATA_AUTO_OFF]))
+    # Presses of the sources used by combos, shared by every combo.
+    hass.data[DOMAIN].setdefault(DATA_PRESS_INDEX, PressIndex(
+        hass, hass.data[DOMAIN][DATA_SOURCES], hass.data[DOMAIN][DATA_ECHO]))
+    # One call returns the live state of every decoder.
+    async_setup_snapshot(hass)
 
     return True
 
@@ -32,7 +62,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.debug("call async_setup_entry")
     #hass.data[DOMAIN][entry.entry_id] = DOMAIN
     hass.data[DOMAIN][entry.entry_id] = {}
-    hass.data[DOMAIN][entry.entry_id]["listener"] = []
+    # Running switches by switch_key and the callbacks applying changed options
+    hass.data[DOMAIN][entry.entry_id]["switches"] = {}
+    hass.data[DOMAIN][entry.entry_id]["option_listeners"] = []
+    # SwitchStats by switch_key, shared by the number and sensor platforms
+    hass.data[DOMAIN][entry.entry_id]["stats"] = {}
+    # SwitchDecoder records by switch_key, the entities only drive them
+    hass.data[DOMAIN][entry.entry_id]["decoders"] = {}
+    hass.data[DOMAIN][entry.entry_id]["reconciler"] = IdleReconciler(
+        hass,
+        entry.options.get(CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY),
+        entry.options.get(CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE),
+        hass.data[DOMAIN][DATA_AUTO_OFF])
+    hass.data[DOMAIN][entry.entry_id][CONF_AUTO_OFF_WINDOW] = entry.options.get(
+        CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW)
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
     # This creates each HA object for each platform your device requires.
@@ -48,7 +91,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 async def update_listener(hass, entry):
     """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    # Only the switches that changed are touched, the others keep running.
+    data = hass.data[DOMAIN][entry.entry_id]
+    data[CONF_AUTO_OFF_WINDOW] = entry.options.get(
+        CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW)
+    data["reconciler"].concurrency = entry.options.get(
+        CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY)
+    data["reconciler"].rate = entry.options.get(CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE)
+    for apply_options in data["option_listeners"]:
+        # a failing platform must not leave the ones after it on the old options
+        try:
+            await apply_options(entry)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("applying the changed options failed : %s", apply_options.__module__)
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
@@ -56,10 +111,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     # needs to unload itself, and remove callbacks. See the classes for further
     # details
     _LOGGER.debug("call async_unload_entry")
+    hass.data[DOMAIN][entry.entry_id]["reconciler"].async_cancel()
 
-    for listener in hass.data[DOMAIN][entry.entry_id]["listener"]:
-        listener()
-    
     unload_ok = all(
         await asyncio.gather(
             *[
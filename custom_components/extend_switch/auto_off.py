@@ -0,0 +1,171 @@
+"""Batched homeassistant.turn_off calls for the Extend Switch integration."""
+import asyncio
+import logging
+
+from homeassistant.core import callback
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# seconds a turn off call may take before it counts as failed
+TURN_OFF_TIMEOUT = 5
+# retries of a failed turn off, the first one after TURN_OFF_BACKOFF seconds, doubling
+TURN_OFF_RETRIES = 2
+TURN_OFF_BACKOFF = 0.5
+# failed turn offs in a row that open the breaker of a source, and the seconds it stays open
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Turn off failures of one source.
+
+    After BREAKER_THRESHOLD failures in a row the breaker opens and the turn
+    offs of the source are skipped for BREAKER_COOLDOWN seconds. Then one is
+    let through (half open): a success closes the breaker, a failure opens it
+    again.
+    """
+
+    __slots__ = ("failures", "consecutive", "opened_at")
+
+    def __init__(self):
+        self.failures = 0
+        self.consecutive = 0
+        self.opened_at = None
+
+    def state(self, now) -> str:
+        if self.opened_at is None:
+            return BREAKER_CLOSED
+        if now < self.opened_at + BREAKER_COOLDOWN:
+            return BREAKER_OPEN
+        return BREAKER_HALF_OPEN
+
+    def allow(self, now) -> bool:
+        return self.state(now) != BREAKER_OPEN
+
+    def success(self) -> None:
+        self.consecutive = 0
+        self.opened_at = None
+
+    def failure(self, now) -> None:
+        self.failures += 1
+        self.consecutive += 1
+        if self.consecutive >= BREAKER_THRESHOLD:
+            self.opened_at = now
+
+    def as_dict(self, now):
+        return {"state": self.state(now), "failures": self.failures,
+                "consecutive": self.consecutive}
+
+
+class AutoOffDispatcher:
+    """Collect the sources to turn off and send them in one service call.
+
+    The first request opens a window; every source requested until it closes
+    is sent with the same ``homeassistant.turn_off`` call. A source that is
+    already pending is not queued twice.
+
+    The call runs in the background with a timeout. When it fails each source
+    is retried on its own with backoff, so one dead device neither blocks nor
+    fails the others, and its breaker stops the calls to it for a while.
+    """
+
+    def __init__(self, hass, echo):
+        self.hass = hass
+        # the calls carry a context of echo, their state changes are not presses
+        self._echo = echo
+        # entity_id -> callback run once its turn off is done, insertion ordered
+        self._pending = {}
+        self._handle = None
+        # entity_id -> CircuitBreaker, only for the sources that failed once
+        self._breakers = {}
+
+    @callback
+    def async_request(self, entity_id, window, done=None) -> None:
+        """Queue a turn off of entity_id, sent at most window seconds later."""
+        if entity_id in self._pending:
+            _LOGGER.debug("drop duplicate turn off : %s", entity_id)
+            return
+        self._pending[entity_id] = done
+        if self._handle is None:
+            self._handle = self.hass.loop.call_later(window, self._async_flush)
+
+    @property
+    def pending(self):
+        """Return the sources waiting for the next turn off call."""
+        return list(self._pending)
+
+    def breaker(self, entity_id):
+        """Return the CircuitBreaker of entity_id, None when it never failed."""
+        return self._breakers.get(entity_id)
+
+    def allowed(self, entity_id) -> bool:
+        """Return False while the breaker of entity_id is open."""
+        breaker = self._breakers.get(entity_id)
+        return breaker is None or breaker.allow(self.hass.loop.time())
+
+    @callback
+    def _async_flush(self) -> None:
+        self._handle = None
+        pending = self._pending
+        self._pending = {}
+        entity_ids = []
+        for entity_id in pending:
+            if self.allowed(entity_id):
+                entity_ids.append(entity_id)
+            else:
+                _LOGGER.debug("breaker open, skip turn off : %s", entity_id)
+        if not entity_ids:
+            return
+        _LOGGER.debug("turn off %d sources : %s", len(entity_ids), entity_ids)
+        self.hass.async_create_background_task(
+            self._async_send(entity_ids, [pending[entity_id] for entity_id in entity_ids]),
+            "extend_switch turn off")
+
+    async def _async_send(self, entity_ids, callbacks) -> None:
+        await self.async_turn_off(entity_ids)
+        for done in callbacks:
+            if done is not None:
+                done()
+
+    async def async_turn_off(self, entity_ids):
+        """Turn entity_ids off with timeout and retries, returns those that failed."""
+        if await self._async_call(entity_ids):
+            return []
+        if len(entity_ids) > 1:
+            # find the failing sources, each one is retried on its own
+            results = await asyncio.gather(
+                *(self.async_turn_off([entity_id]) for entity_id in entity_ids))
+            return [entity_id for failed in results for entity_id in failed]
+
+        delay = TURN_OFF_BACKOFF
+        for _ in range(TURN_OFF_RETRIES):
+            await asyncio.sleep(delay)
+            delay *= 2
+            if await self._async_call(entity_ids):
+                return []
+        entity_id = entity_ids[0]
+        breaker = self._breakers.setdefault(entity_id, CircuitBreaker())
+        breaker.failure(self.hass.loop.time())
+        _LOGGER.warning("turn off of %s failed %d times in a row, breaker %s",
+                        entity_id, breaker.consecutive, breaker.state(self.hass.loop.time()))
+        return entity_ids
+
+    async def _async_call(self, entity_ids) -> bool:
+        try:
+            async with asyncio.timeout(TURN_OFF_TIMEOUT):
+                await self.hass.services.async_call(
+                    'homeassistant', 'turn_off', {"entity_id": entity_ids}, blocking=True,
+                    context=self._echo.async_context())
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("turn off of %s failed : %s", entity_ids, err or type(err).__name__)
+            return False
+        for entity_id in entity_ids:
+            breaker = self._breakers.get(entity_id)
+            if breaker is not None:
+                breaker.success()
+        return True
@@ -1,5 +1,7 @@
 """Config flow for Hello World integration."""
 import logging
+import uuid
+from collections import deque
 import voluptuous as vol
 from typing import Any, Dict, Optional
 from datetime import datetime
@@ -16,6 +18,18 @@ from homeassistant.helpers.device_registry import (
 from homeassistant.helpers.selector import selector
 
 from .const import CONF_PUSH_MAX, CONF_PUSH_WAIT_TIME, CONF_SWITCH_ENTITY, CONF_SWITCHES, DOMAIN, CONF_ADD_ANODHER, CONF_NAME, NAME, PUSH_MAX
+from .const import CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW, CONF_UNIQUE_ID
+from .const import CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY
+from .const import CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE
+from .const import CONF_OUTPUT_MODE, OUTPUT_MODE_PULSE, OUTPUT_MODES
+from .const import CONF_ADAPTIVE_WAIT, CONF_PUSH_WAIT_MIN, DEFAULT_PUSH_WAIT_MIN, CONF_OPTIMISTIC
+from .const import CONF_PATTERNS, CONF_LONG_PRESS_TIME, DEFAULT_LONG_PRESS_TIME, CONF_PRESS_MATCH
+from .const import CONF_DEBOUNCE_TIME, DEFAULT_DEBOUNCE_TIME
+from .const import CONF_EXTRA_SOURCES, CONF_SOURCE_SKEW, DEFAULT_SOURCE_SKEW
+from .const import CONF_COMBOS, CONF_ADD_COMBO, CONF_COMBO_MODE, CONF_COMBO_SOURCES, CONF_COMBO_WINDOW
+from .const import COMBO_MODES, COMBO_SEQUENCE, DEFAULT_COMBO_WINDOW
+from .decoder import parse_patterns
+from .predicates import compile_press_match
 
 from homeassistant import config_entries, core, exceptions
 from homeassistant.core import callback
@@ -74,9 +88,16 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry) -> None:
         self.data = {}
         if CONF_SWITCHES in config_entry.options:
-            self.data[CONF_SWITCHES] = config_entry.options[CONF_SWITCHES]
+            self.data[CONF_SWITCHES] = list(config_entry.options[CONF_SWITCHES])
         else:
             self.data[CONF_SWITCHES] = []
+        self.data[CONF_COMBOS] = list(config_entry.options.get(CONF_COMBOS, []))
+        self.data[CONF_AUTO_OFF_WINDOW] = config_entry.options.get(
+            CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW)
+        self.data[CONF_RECONCILE_CONCURRENCY] = config_entry.options.get(
+            CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY)
+        self.data[CONF_RECONCILE_RATE] = config_entry.options.get(
+            CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE)
 
     async def async_step_init(
         self, user_input: Dict[str, Any] = None
@@ -95,7 +116,6 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         # Default value for our multi-select.
         #entity_map = {e.entity_id : e for e in entries}
         all_entities = {}
-        all_entities_by_id = {}
 
         entity_registry = homeassistant.helpers.entity_registry.async_get(
             self.hass)
@@ -111,20 +131,21 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
         # Default value for our multi-select.
 
-        for host in self.data[CONF_SWITCHES]:
-            for e in entities:
-                if e.original_name == host[CONF_NAME]:
-                    name = e.original_name
-
-                    all_entities[e.entity_id] = '{} - {}'.format(
-                        name, host[CONF_SWITCH_ENTITY])
-
-                    all_entities_by_id[(
-                        host[CONF_SWITCH_ENTITY],
-                        host[CONF_NAME],
-                        host[CONF_PUSH_WAIT_TIME],
-                        host[CONF_PUSH_MAX]
-                    )] = e.entity_id
+        # only the number entities are switches, a combo may carry the name of a legacy one
+        switches_by_entity = _index_switch_entities(
+            self.data[CONF_SWITCHES], [e for e in entities if e.domain == "number"])
+        for entity_id, host in switches_by_entity.items():
+            all_entities[entity_id] = '{} - {}'.format(
+                host[CONF_NAME], host[CONF_SWITCH_ENTITY])
+        combos_by_unique_id = {
+            "{}_combo".format(combo[CONF_UNIQUE_ID]): combo for combo in self.data[CONF_COMBOS]}
+        combos_by_entity = {}
+        for e in entities:
+            combo = combos_by_unique_id.get(e.unique_id)
+            if combo is not None:
+                combos_by_entity[e.entity_id] = combo
+                all_entities[e.entity_id] = '{} - {} : {}'.format(
+                    combo[CONF_NAME], combo[CONF_COMBO_MODE], ', '.join(combo[CONF_COMBO_SOURCES]))
 
         if user_input is not None:
             if not errors:
@@ -132,35 +153,38 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 # additional repo.
                 # remove devices
                 self.data[CONF_SWITCHES].clear()
-                remove_entities = []
-
-                for key in all_entities_by_id:
-                    if all_entities_by_id[key] not in user_input[CONF_SWITCHES]:
-                        _LOGGER.debug("remove entity : %s",
-                                      all_entities_by_id[key])
-                        remove_entities.append(all_entities_by_id[key])
-                        #self.config_entry.data[CONF_DEVICES].remove( { host[CONF_HOST], [e.name for e in devices if e.id == all_devices_by_host[host[CONF_HOST]]] })
+                self.data[CONF_AUTO_OFF_WINDOW] = user_input.get(
+                    CONF_AUTO_OFF_WINDOW, DEFAULT_AUTO_OFF_WINDOW)
+                self.data[CONF_RECONCILE_CONCURRENCY] = user_input.get(
+                    CONF_RECONCILE_CONCURRENCY, DEFAULT_RECONCILE_CONCURRENCY)
+                self.data[CONF_RECONCILE_RATE] = user_input.get(
+                    CONF_RECONCILE_RATE, DEFAULT_RECONCILE_RATE)
+
+                for entity_id, host in switches_by_entity.items():
+                    if entity_id not in user_input[CONF_SWITCHES]:
+                        # removed with its registry entry by the number platform
+                        _LOGGER.debug("remove entity : %s", entity_id)
                     else:
-                        _LOGGER.debug("append entity : %s", key[0])
-                        self.data[CONF_SWITCHES].append(
-                            {
-                                CONF_SWITCH_ENTITY: key[0],
-                                CONF_NAME: key[1],
-                                CONF_PUSH_WAIT_TIME: key[2],
-                                CONF_PUSH_MAX: key[3]
-                            }
-                        )
-
-                for id in remove_entities:
-                    entity_registry.async_remove(id)
+                        _LOGGER.debug("append entity : %s", host[CONF_SWITCH_ENTITY])
+                        self.data[CONF_SWITCHES].append(host)
+
+                self.data[CONF_COMBOS] = []
+                for entity_id, combo in combos_by_entity.items():
+                    if entity_id not in user_input[CONF_SWITCHES]:
+                        # removed with its registry entry by the event platform
+                        _LOGGER.debug("remove combo : %s", entity_id)
+                    else:
+                        self.data[CONF_COMBOS].append(combo)
 
                 if user_input.get(CONF_ADD_ANODHER, False):
                     # if len(self.devices) <= 0:
                     #    return self.async_create_entry(title=self.cnfig_entry.data[CONF_AREA_NAME], data=self.config_entry.data)
                     # else:
                     return await self.async_step_entity()
+                if user_input.get(CONF_ADD_COMBO, False):
+                    return await self.async_step_combo()
 
-                if len(self.data[CONF_SWITCHES]) <= 0:
+                if len(self.data[CONF_SWITCHES]) <= 0 and len(self.data[CONF_COMBOS]) <= 0:
                     for d in devices:
                         device_registry.async_remove_device(d.id)
 
@@ -171,7 +195,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         options_schema = vol.Schema(
             {
                 vol.Optional(CONF_SWITCHES, default=list(all_entities)): cv.multi_select(all_entities),
+                vol.Optional(CONF_AUTO_OFF_WINDOW, default=self.data[CONF_AUTO_OFF_WINDOW]): vol.All(vol.Coerce(int), vol.Range(0, 1000)),
+                vol.Optional(CONF_RECONCILE_CONCURRENCY, default=self.data[CONF_RECONCILE_CONCURRENCY]): vol.All(vol.Coerce(int), vol.Range(1, 100)),
+                vol.Optional(CONF_RECONCILE_RATE, default=self.data[CONF_RECONCILE_RATE]): vol.All(vol.Coerce(float), vol.Range(0.1, 1000)),
                 vol.Optional(CONF_ADD_ANODHER): cv.boolean,
+                vol.Optional(CONF_ADD_COMBO): cv.boolean,
 
                 #vol.Optional(CONF_USE_SETUP_MODE, False, cv.boolean),
                 #vol.Optional(CONF_ADD_GROUP_DEVICE, False, cv.boolean),
@@ -186,15 +214,39 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Second step in config flow to add a repo to watch."""
         errors: Dict[str, str] = {}
         if user_input is not None:
+            try:
+                parse_patterns(user_input.get(CONF_PATTERNS))
+            except ValueError as err:
+                _LOGGER.debug("invalid patterns : %s", err)
+                errors[CONF_PATTERNS] = "invalid_patterns"
+            try:
+                compile_press_match(user_input.get(CONF_PRESS_MATCH))
+            except ValueError as err:
+                _LOGGER.debug("invalid press match : %s", err)
+                errors[CONF_PRESS_MATCH] = "invalid_press_match"
 
             if not errors:
                 # Input is valid, set data.
                 self.data[CONF_SWITCHES].append(
                     {
+                        CONF_UNIQUE_ID: uuid.uuid4().hex,
                         CONF_SWITCH_ENTITY: user_input[CONF_SWITCH_ENTITY],
                         CONF_NAME: user_input.get(CONF_NAME, user_input[CONF_SWITCH_ENTITY]),
                         CONF_PUSH_WAIT_TIME: user_input[CONF_PUSH_WAIT_TIME],
                         CONF_PUSH_MAX: user_input[CONF_PUSH_MAX],
+                        CONF_OUTPUT_MODE: user_input.get(CONF_OUTPUT_MODE, OUTPUT_MODE_PULSE),
+                        CONF_ADAPTIVE_WAIT: user_input.get(CONF_ADAPTIVE_WAIT, False),
+                        CONF_PUSH_WAIT_MIN: user_input.get(CONF_PUSH_WAIT_MIN, DEFAULT_PUSH_WAIT_MIN),
+                        CONF_OPTIMISTIC: user_input.get(CONF_OPTIMISTIC, False),
+                        CONF_PATTERNS: user_input.get(CONF_PATTERNS, ""),
+                        CONF_LONG_PRESS_TIME: user_input.get(CONF_LONG_PRESS_TIME, DEFAULT_LONG_PRESS_TIME),
+                        CONF_PRESS_MATCH: user_input.get(CONF_PRESS_MATCH, ""),
+                        CONF_DEBOUNCE_TIME: user_input.get(CONF_DEBOUNCE_TIME, DEFAULT_DEBOUNCE_TIME),
+                        # other switches of the same button, counted as one
+                        CONF_EXTRA_SOURCES: [
+                            source for source in dict.fromkeys(user_input.get(CONF_EXTRA_SOURCES) or [])
+                            if source != user_input[CONF_SWITCH_ENTITY]],
+                        CONF_SOURCE_SKEW: user_input.get(CONF_SOURCE_SKEW, DEFAULT_SOURCE_SKEW),
                     }
                 )
 
@@ -219,11 +271,93 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         vol.Optional(CONF_NAME): cv.string,
                         vol.Required(CONF_PUSH_WAIT_TIME, default=1000): int,
                         vol.Required(CONF_PUSH_MAX, default=PUSH_MAX): int,
+                        vol.Optional(CONF_OUTPUT_MODE, default=OUTPUT_MODE_PULSE): selector(
+                            {"select": {"options": OUTPUT_MODES, "translation_key": CONF_OUTPUT_MODE}}),
+                        vol.Optional(CONF_ADAPTIVE_WAIT, default=False): cv.boolean,
+                        vol.Optional(CONF_PUSH_WAIT_MIN, default=DEFAULT_PUSH_WAIT_MIN): int,
+                        vol.Optional(CONF_OPTIMISTIC, default=False): cv.boolean,
+                        vol.Optional(CONF_PATTERNS, default=""): cv.string,
+                        vol.Optional(CONF_LONG_PRESS_TIME, default=DEFAULT_LONG_PRESS_TIME): int,
+                        vol.Optional(CONF_PRESS_MATCH, default=""): cv.string,
+                        vol.Optional(CONF_DEBOUNCE_TIME, default=DEFAULT_DEBOUNCE_TIME): vol.All(vol.Coerce(int), vol.Range(0, 1000)),
+                        vol.Optional(CONF_EXTRA_SOURCES, default=[]): selector({"entity": {"multiple": True}}),
+                        vol.Optional(CONF_SOURCE_SKEW, default=DEFAULT_SOURCE_SKEW): vol.All(vol.Coerce(int), vol.Range(0, 1000)),
                         vol.Optional(CONF_ADD_ANODHER): cv.boolean,
                     }
             ), errors=errors
         )
 
+    async def async_step_combo(self, user_input: Optional[Dict[str, Any]] = None):
+        """Add a combo: several sources pressed in order (sequence) or together (chord)."""
+        errors: Dict[str, str] = {}
+        if user_input is not None:
+            sources = user_input.get(CONF_COMBO_SOURCES) or []
+            if len(set(sources)) < 2:
+                errors[CONF_COMBO_SOURCES] = "invalid_combo"
+
+            if not errors:
+                self.data[CONF_COMBOS].append(
+                    {
+                        CONF_UNIQUE_ID: uuid.uuid4().hex,
+                        CONF_NAME: user_input[CONF_NAME],
+                        CONF_COMBO_MODE: user_input.get(CONF_COMBO_MODE, COMBO_SEQUENCE),
+                        # in the order they were picked, the order of a sequence
+                        CONF_COMBO_SOURCES: list(sources),
+                        CONF_COMBO_WINDOW: user_input.get(CONF_COMBO_WINDOW, DEFAULT_COMBO_WINDOW),
+                    }
+                )
+                if user_input.get(CONF_ADD_COMBO, False):
+                    return await self.async_step_combo()
+                self.data["modifydatetime"] = datetime.now()
+                return self.async_create_entry(title=NAME, data=self.data)
+
+        return self.async_show_form(
+            step_id="combo",
+            data_schema=vol.Schema(
+                    {
+                        vol.Required(CONF_NAME): cv.string,
+                        vol.Required(CONF_COMBO_MODE, default=COMBO_SEQUENCE): selector(
+                            {"select": {"options": COMBO_MODES, "translation_key": CONF_COMBO_MODE}}),
+                        vol.Required(CONF_COMBO_SOURCES): selector({"entity": {"multiple": True}}),
+                        vol.Required(CONF_COMBO_WINDOW, default=DEFAULT_COMBO_WINDOW): vol.All(vol.Coerce(int), vol.Range(50, 10000)),
+                        vol.Optional(CONF_ADD_COMBO): cv.boolean,
+                    }
+            ), errors=errors
+        )
+
+
+def _index_switch_entities(switches, entities):
+    """Return the configured switch of each registry entity id.
+
+    The registry entities are indexed once, by unique_id and by original_name
+    for switches configured before their unique_id was stored, so each switch
+    resolves in O(1). Switches sharing a name each get their own entity.
+    """
+    by_unique_id = {}
+    by_name = {}
+    for e in entities:
+        by_unique_id[e.unique_id] = e
+        by_name.setdefault(e.original_name, deque()).append(e)
+
+    switches_by_entity = {}
+    legacy = []
+    for host in switches:
+        e = by_unique_id.get(host.get(CONF_UNIQUE_ID))
+        if e is None:
+            legacy.append(host)
+        else:
+            switches_by_entity[e.entity_id] = host
+
+    for host in legacy:
+        candidates = by_name.get(host[CONF_NAME])
+        while candidates:
+            e = candidates.popleft()
+            if e.entity_id not in switches_by_entity:
+                switches_by_entity[e.entity_id] = host
+                break
+
+    return switches_by_entity
+
 
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
@@ -14,7 +14,48 @@ CONF_PUSH_WAIT_TIME = "push_wait_time"
 CONF_SWITCHES = "switches"
 CONF_ADD_ANODHER = "add_another"
 CONF_NAME = "name"
+CONF_UNIQUE_ID = "unique_id"
+CONF_OUTPUT_MODE = "output_mode"
+CONF_ADAPTIVE_WAIT = "adaptive_wait"
+CONF_PUSH_WAIT_MIN = "push_wait_min"
+CONF_OPTIMISTIC = "optimistic"
+CONF_PATTERNS = "patterns"
+CONF_PRESS_MATCH = "press_match"
+CONF_DEBOUNCE_TIME = "debounce_time"
+CONF_EXTRA_SOURCES = "extra_sources"
+CONF_SOURCE_SKEW = "source_skew"
+CONF_LONG_PRESS_TIME = "long_press_time"
+
+# pulse: the number goes 0 -> count -> 0, event: only an event entity fires
+OUTPUT_MODE_PULSE = "pulse"
+OUTPUT_MODE_EVENT = "event"
+OUTPUT_MODE_LATCHED = "latched"
+OUTPUT_MODES = [OUTPUT_MODE_PULSE, OUTPUT_MODE_EVENT, OUTPUT_MODE_LATCHED]
+
+# combos: gestures over several sources, in order (sequence) or together (chord)
+CONF_COMBOS = "combos"
+CONF_ADD_COMBO = "add_combo"
+CONF_COMBO_MODE = "combo_mode"
+CONF_COMBO_SOURCES = "combo_sources"
+CONF_COMBO_WINDOW = "combo_window"
+COMBO_SEQUENCE = "sequence"
+COMBO_CHORD = "chord"
+COMBO_MODES = [COMBO_SEQUENCE, COMBO_CHORD]
+DEFAULT_COMBO_WINDOW = 1000
 CONF_PUSH_MAX = "push_max"
+CONF_AUTO_OFF_WINDOW = "auto_off_window"
+CONF_RECONCILE_CONCURRENCY = "reconcile_concurrency"
+CONF_RECONCILE_RATE = "reconcile_rate"
+
+DATA_SCHEDULER = "scheduler"
+DATA_AUTO_OFF = "auto_off"
+DATA_SOURCES = "sources"
+DATA_ECHO = "echo"
+DATA_PRESS_INDEX = "press_index"
+DATA_SHARED_SOURCES = "shared_sources"
+
+SIGNAL_GESTURE = DOMAIN + "_gesture_{}_{}"
+EVENT_TYPE_PRESS = "press_{}"
 
 
 NUMBER_MIN = 0
@@ -22,6 +63,24 @@ NUMBER_MAX = 100
 NUMBER_STEP = 1
 PUSH_MAX = 10
 
+# lower bound of the adaptive window, see decoder.SwitchDecoder.wait_window
+DEFAULT_PUSH_WAIT_MIN = 250
+
+# milliseconds a press must last to be long (L) or held (H) in a gesture pattern
+DEFAULT_LONG_PRESS_TIME = 500
+# milliseconds a change must follow the previous press, 0 keeps every change
+DEFAULT_DEBOUNCE_TIME = 0
+# milliseconds two sources of one switch may report the same press apart
+DEFAULT_SOURCE_SKEW = 150
+
+# press timestamps kept per switch, shown in the press times attribute
+PRESS_RING_SIZE = 16
+# milliseconds turn off requests are collected before one call is sent
+DEFAULT_AUTO_OFF_WINDOW = 50
+# turn offs of the sources found on at startup: calls in flight, calls per second
+DEFAULT_RECONCILE_CONCURRENCY = 4
+DEFAULT_RECONCILE_RATE = 10
+
 OPTIONS = [
     (CONF_SWITCH_ENTITY, "", cv.string),
     (CONF_PUSH_WAIT_TIME, "0.5", vol.All(vol.Coerce(float), vol.Range(0, 1))),
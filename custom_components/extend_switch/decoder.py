@@ -0,0 +1,360 @@
+"""Press decoding helpers of Extend Switch.
+
+This module only depends on the standard library so the same code can run
+outside of Home Assistant.
+"""
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P-square algorithm.
+
+    Five markers are kept whatever the number of samples, so adding a sample
+    is O(1) in time and memory (Jain and Chlamtac, 1985).
+    """
+
+    __slots__ = ("p", "count", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x) -> None:
+        """Add one sample."""
+        heights = self.heights
+        self.count += 1
+        if self.count <= 5:
+            heights.append(x)
+            if self.count == 5:
+                heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / \
+                        (positions[i + d] - positions[i])
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        """Return the current estimate, None before the first sample."""
+        if self.count >= 5:
+            return self.heights[2]
+        if not self.heights:
+            return None
+        ordered = sorted(self.heights)
+        return ordered[int(round(self.p * (len(ordered) - 1)))]
+
+
+# press symbols of the gesture patterns
+SHORT = 0
+LONG = 1
+HOLD = 2
+SYMBOLS = {"S": SHORT, "L": LONG, "H": HOLD}
+DEAD = -1
+
+
+def parse_patterns(text):
+    """Parse "name=SSL, name2=H" into {name: pattern}, raises ValueError.
+
+    S is a short press, L a long press once released and H a press held past
+    the long press time, reported while still held so it must end the pattern.
+    A press that can be H is reported as H before it could be released as L,
+    so L and H may not follow the same prefix.
+    """
+    patterns = {}
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, pattern = item.partition("=")
+        name = name.strip()
+        pattern = pattern.strip().upper()
+        if not sep or not name or not pattern:
+            raise ValueError("pattern must look like name=SSL : {}".format(item))
+        if any(char not in SYMBOLS for char in pattern):
+            raise ValueError("pattern may only use S, L and H : {}".format(item))
+        if "H" in pattern[:-1]:
+            raise ValueError("H can only end a pattern : {}".format(item))
+        if name in patterns or pattern in patterns.values():
+            raise ValueError("duplicate pattern : {}".format(item))
+        patterns[name] = pattern
+
+    long_prefixes = {
+        pattern[:i] for pattern in patterns.values() for i, char in enumerate(pattern) if char == "L"}
+    for name, pattern in patterns.items():
+        if pattern.endswith("H") and pattern[:-1] in long_prefixes:
+            raise ValueError("L and H can not follow the same presses : {}={}".format(name, pattern))
+    return patterns
+
+
+class GesturePatterns:
+    """Gesture patterns compiled into a transition table.
+
+    Every pattern starts at the first press of a gesture, so the trie of the
+    patterns is a DFA: one row per prefix, one column per symbol. Decoding a
+    press is one ``table[state][symbol]`` lookup whatever the number of
+    patterns; DEAD means no pattern can match the gesture anymore.
+    """
+
+    __slots__ = ("table", "accept", "names")
+
+    def __init__(self, patterns):
+        table = [[DEAD, DEAD, DEAD]]
+        accept = [None]
+        for name, pattern in patterns.items():
+            state = 0
+            for char in pattern:
+                symbol = SYMBOLS[char]
+                next_state = table[state][symbol]
+                if next_state == DEAD:
+                    next_state = len(table)
+                    table.append([DEAD, DEAD, DEAD])
+                    accept.append(None)
+                    table[state][symbol] = next_state
+                state = next_state
+            accept[state] = name
+        self.table = tuple(tuple(row) for row in table)
+        self.accept = tuple(accept)
+        self.names = list(patterns)
+
+
+class PressRing:
+    """Fixed size ring buffer of the latest press timestamps."""
+
+    __slots__ = ("_buffer", "_size", "count")
+
+    def __init__(self, size):
+        self._buffer = [0.0] * size
+        self._size = size
+        # presses appended since creation, the buffer keeps the last _size
+        self.count = 0
+
+    def append(self, timestamp) -> None:
+        self._buffer[self.count % self._size] = timestamp
+        self.count += 1
+
+    @property
+    def latest(self):
+        """Return the latest timestamp, None when empty."""
+        if not self.count:
+            return None
+        return self._buffer[(self.count - 1) % self._size]
+
+    def since(self, first):
+        """Return the timestamps appended since count was first, oldest first."""
+        first = max(first, self.count - self._size, 0)
+        return [self._buffer[i % self._size] for i in range(first, self.count)]
+
+
+# adaptive window: push_wait_min <= quantile of the press intervals * margin <= push_wait_time
+ADAPTIVE_QUANTILE = 0.95
+ADAPTIVE_MARGIN = 1.25
+ADAPTIVE_MIN_SAMPLES = 20
+
+
+class SwitchDecoder:
+    """Decoder state and logic of one switch.
+
+    Press times are the timestamps of the source state changes in seconds, so
+    the decoder runs the same in Home Assistant and in virtual time. The
+    configured durations are milliseconds, like the options.
+    """
+
+    __slots__ = (
+        # configuration
+        "source", "sources", "skew", "push_wait_time", "push_max", "push_wait_min", "long_press_time",
+        "patterns", "estimator", "optimistic", "output_mode", "press_match", "debounce",
+        # running gesture
+        "push_count", "window", "deadline", "last_change", "source_state", "value",
+        "presses", "gesture_first", "pattern_state", "press_started", "last_source",
+        # last emission
+        "last_pattern", "last_final", "sequence",
+    )
+
+    def __init__(self, source, ring_size=16):
+        self.source = source
+        # every source feeding the counter, the switch entity first
+        self.sources = (source,)
+        # seconds two sources may report the same press apart
+        self.skew = 0.0
+        self.push_wait_time = 1000
+        self.push_max = 1
+        self.push_wait_min = 0
+        self.long_press_time = 500
+        self.patterns = None
+        self.estimator = None
+        self.optimistic = False
+        self.output_mode = None
+        # predicate(old_state, new_state) of a stateless source, None for on/off toggles
+        self.press_match = None
+        # seconds a change must follow the last accepted one, shorter ones are bounces
+        self.debounce = 0.0
+        self.push_count = 0
+        self.window = 0.0
+        self.deadline = None
+        self.last_change = float("-inf")
+        self.source_state = None
+        self.value = 0
+        self.presses = PressRing(ring_size)
+        self.gesture_first = 0
+        self.pattern_state = 0
+        self.press_started = None
+        self.last_source = source
+        self.last_pattern = None
+        self.last_final = None
+        # gestures committed, so a repeated count is still a new state
+        self.sequence = 0
+
+    def configure(self, push_wait_time, push_max, push_wait_min=0, long_press_time=500,
+                  patterns=None, adaptive=False, optimistic=False, debounce_time=0,
+                  sources=None, source_skew=0) -> None:
+        """Apply the configuration, a learned adaptive window is kept while enabled."""
+        self.push_wait_time = push_wait_time
+        self.push_max = push_max
+        self.push_wait_min = push_wait_min
+        self.long_press_time = long_press_time
+        if patterns is None or self.patterns is None or patterns.table != self.patterns.table:
+            self.pattern_state = 0
+        self.patterns = patterns
+        if not adaptive:
+            self.estimator = None
+        elif self.estimator is None:
+            self.estimator = P2Quantile(ADAPTIVE_QUANTILE)
+        self.optimistic = optimistic
+        self.debounce = debounce_time / 1000
+        self.sources = tuple(dict.fromkeys((self.source,) + tuple(sources or ())))
+        self.skew = source_skew / 1000 if len(self.sources) > 1 else 0.0
+
+    def wait_window(self) -> float:
+        """Return the seconds the gesture window stays open after a press."""
+        estimator = self.estimator
+        if estimator is None or estimator.count < ADAPTIVE_MIN_SAMPLES:
+            return self.push_wait_time / 1000
+        window = estimator.value * ADAPTIVE_MARGIN
+        return min(self.push_wait_time, max(self.push_wait_min, window)) / 1000
+
+    @property
+    def complete(self) -> bool:
+        """Return True when no higher count can follow."""
+        return self.push_count >= self.push_max
+
+    @property
+    def pattern(self):
+        """Return the name of the pattern the gesture matches so far, or None."""
+        if self.patterns is None or self.pattern_state == DEAD:
+            return None
+        return self.patterns.accept[self.pattern_state]
+
+    def duplicate(self, source, changed_at) -> bool:
+        """Return True when another source reported this change within the skew."""
+        return source != self.last_source and changed_at - self.last_change < self.skew
+
+    def bounced(self, changed_at, source=None) -> bool:
+        """Return True for a change within debounce_time of the last accepted one."""
+        if changed_at - self.last_change < self.debounce:
+            return True
+        self.last_change = changed_at
+        if source is not None:
+            self.last_source = source
+        return False
+
+    def closed_before(self, pressed_at) -> bool:
+        """Return True when the window of the running gesture closed before pressed_at."""
+        latest = self.presses.latest
+        return bool(self.push_count) and latest is not None and pressed_at - latest > self.window
+
+    def press(self, pressed_at) -> None:
+        """Count a toggle of the source."""
+        estimator = self.estimator
+        if estimator is not None and self.presses.count:
+            # intervals up to push_wait_time, also those that ended up in two gestures
+            interval = (pressed_at - self.presses.latest) * 1000
+            if interval <= self.push_wait_time:
+                estimator.add(interval)
+        self.presses.append(pressed_at)
+        self.count_press()
+
+    def count_press(self) -> None:
+        # runs for every press, also in the offline replay, so no min() or call without need
+        push_count = self.push_count + 1
+        self.push_count = push_count if push_count < self.push_max else self.push_max
+        if self.estimator is None:
+            self.window = self.push_wait_time / 1000
+        else:
+            self.window = self.wait_window()
+
+    def commit(self) -> int:
+        """End the running gesture, returns its count."""
+        count = self.push_count
+        self.push_count = 0
+        self.gesture_first = self.presses.count
+        self.pattern_state = 0
+        # a release after the commit must not feed the next gesture
+        self.press_started = None
+        return count
+
+    def pattern_press(self, pressed_at) -> bool:
+        """Start a press of a momentary source, returns True when it can become a hold."""
+        self.press_started = pressed_at
+        self.presses.append(pressed_at)
+        state = self.pattern_state
+        return state != DEAD and self.patterns.table[state][HOLD] != DEAD
+
+    def pattern_release(self, released_at) -> bool:
+        """End a press, returns False when its start was not seen or it was a hold."""
+        started = self.press_started
+        if started is None:
+            return False
+        self.press_started = None
+        if (released_at - started) * 1000 >= self.long_press_time:
+            self._feed(LONG)
+        else:
+            self._feed(SHORT)
+        return True
+
+    def pattern_hold(self) -> bool:
+        """The press is held past long_press_time, returns True when a pattern ends here."""
+        self.press_started = None
+        self._feed(HOLD)
+        return self.pattern is not None
+
+    def _feed(self, symbol) -> None:
+        state = self.pattern_state
+        if state != DEAD:
+            self.pattern_state = self.patterns.table[state][symbol]
+        self.count_press()
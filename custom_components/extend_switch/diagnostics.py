@@ -0,0 +1,33 @@
+"""Diagnostics support for Extend Switch."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_SWITCHES, CONF_SWITCH_ENTITY, CONF_EXTRA_SOURCES, DOMAIN, DATA_AUTO_OFF
+from .number import switch_key
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return the configuration and the decoder counters of every switch."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    auto_off = hass.data[DOMAIN][DATA_AUTO_OFF]
+    switches = []
+    for conf in entry.options.get(CONF_SWITCHES) or []:
+        key = switch_key(conf)
+        entity = data["switches"].get(key)
+        stats = data["stats"].get(key)
+        # one breaker per source, the switch entity first
+        sources = dict.fromkeys([conf[CONF_SWITCH_ENTITY], *(conf.get(CONF_EXTRA_SOURCES) or [])])
+        turn_off = {}
+        for source in sources:
+            breaker = auto_off.breaker(source)
+            turn_off[source] = breaker.as_dict(hass.loop.time()) if breaker is not None else None
+        switches.append({
+            "config": dict(conf),
+            "entity_id": entity.entity_id if entity is not None else None,
+            "stats": stats.as_dict() if stats is not None else None,
+            "turn_off": turn_off,
+        })
+    return {
+        "options": {k: v for k, v in entry.options.items() if k != CONF_SWITCHES},
+        "switches": switches,
+    }
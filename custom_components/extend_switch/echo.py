@@ -0,0 +1,48 @@
+"""Recognize the state changes caused by our own turn off calls."""
+import logging
+
+from homeassistant.core import Context, callback
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# seconds a turn off context is remembered, slow devices report well within it
+ECHO_CONTEXT_TTL = 30
+
+
+class EchoContexts:
+    """Contexts of the service calls this integration sent.
+
+    Home Assistant passes the context of a service call on to the state
+    changes it causes, so a state change carrying one of these contexts is
+    our own echo, whatever happened in between. The ids are kept in a dict
+    in creation order and expire after ECHO_CONTEXT_TTL seconds.
+    """
+
+    def __init__(self, hass):
+        self.hass = hass
+        # context id -> loop time it expires at
+        self._contexts = {}
+
+    @callback
+    def async_context(self) -> Context:
+        """Return a new context to send a turn off call with."""
+        now = self.hass.loop.time()
+        contexts = self._contexts
+        while contexts:
+            context_id, expires = next(iter(contexts.items()))
+            if expires > now:
+                break
+            del contexts[context_id]
+        context = Context()
+        contexts[context.id] = now + ECHO_CONTEXT_TTL
+        return context
+
+    def is_echo(self, context) -> bool:
+        """Return True when context is one of ours or was created by one of ours."""
+        contexts = self._contexts
+        return context.id in contexts or (
+            context.parent_id is not None and context.parent_id in contexts)
+
+    def __len__(self):
+        return len(self._contexts)
@@ -0,0 +1,182 @@
+"""Gesture event entities of Extend Switch."""
+import logging
+
+from homeassistant.components.event import EventEntity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import *
+from .number import Device, async_remove_entity, compile_patterns, gesture_signal, switch_key
+from .press_index import ComboMatcher
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _event_types(conf):
+    event_types = [EVENT_TYPE_PRESS.format(count) for count in range(1, int(conf[CONF_PUSH_MAX]) + 1)]
+    patterns = compile_patterns(conf.get(CONF_PATTERNS))
+    if patterns is not None:
+        event_types.extend(patterns.names)
+    return event_types
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Add an event entity for every switch in event output mode and every combo."""
+
+    device = Device(NAME, config_entry)
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    events = {}
+    combos = {}
+
+    async def async_apply_options(entry):
+        """Add, remove or update the event entities of the switches that changed."""
+        configs = {
+            switch_key(conf): conf
+            for conf in entry.options.get(CONF_SWITCHES) or []
+            if conf.get(CONF_OUTPUT_MODE, OUTPUT_MODE_PULSE) == OUTPUT_MODE_EVENT
+        }
+        combo_configs = {conf[CONF_UNIQUE_ID]: conf for conf in entry.options.get(CONF_COMBOS) or []}
+
+        for key in [key for key in combos if key not in combo_configs]:
+            await async_remove_entity(hass, combos.pop(key), "event")
+
+        for key in [key for key in events if key not in configs]:
+            await async_remove_entity(hass, events.pop(key), "event")
+
+        new_events = []
+        for key, conf in configs.items():
+            event = events.get(key)
+            if event is not None:
+                event.async_update_config(conf)
+                continue
+            events[key] = event = ExtendSwitchEvent(device, entry.entry_id, conf)
+            new_events.append(event)
+        for key, conf in combo_configs.items():
+            combo = combos.get(key)
+            if combo is not None:
+                combo.async_update_config(conf)
+                continue
+            combos[key] = combo = ExtendSwitchCombo(device, conf)
+            new_events.append(combo)
+
+        if new_events:
+            async_add_entities(new_events)
+
+    await async_apply_options(config_entry)
+    data["option_listeners"].append(async_apply_options)
+
+
+class ExtendSwitchEvent(EventEntity):
+    """Fires one event per gesture of a switch, press_<count> or the pattern name."""
+
+    should_poll = False
+
+    def __init__(self, device, entry_id, conf):
+        """Initialize the event entity."""
+        self._device = device
+        self._signal = gesture_signal(entry_id, switch_key(conf))
+        self._attr_name = conf[CONF_NAME]
+        self._attr_event_types = _event_types(conf)
+        if CONF_UNIQUE_ID in conf:
+            self._attr_unique_id = "{}_event".format(conf[CONF_UNIQUE_ID])
+        else:
+            self._attr_unique_id = "{}_{}_{}_event".format(
+                entry_id, conf[CONF_SWITCH_ENTITY], conf[CONF_NAME])
+
+    @property
+    def device_info(self):
+        """Information about this entity/device."""
+        return {
+            "identifiers": {(DOMAIN, self._device.device_id)},
+            "name": self._device.name,
+            "sw_version": self._device.firmware_version,
+            "model": self._device.model,
+            "manufacturer": self._device.manufacturer
+        }
+
+    async def async_added_to_hass(self):
+        """Run when this Entity has been added to HA."""
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, self._signal, self._async_handle_gesture))
+
+    @callback
+    def async_update_config(self, conf) -> None:
+        """Follow a changed push_max or pattern list."""
+        event_types = _event_types(conf)
+        if event_types != self._attr_event_types:
+            self._attr_event_types = event_types
+            if self.hass is not None and self.platform is not None:
+                self.async_write_ha_state()
+
+    @callback
+    def _async_handle_gesture(self, gesture) -> None:
+        event_type = gesture.get("pattern") or EVENT_TYPE_PRESS.format(gesture["count"])
+        self._trigger_event(event_type, gesture)
+        self.async_write_ha_state()
+
+
+class ExtendSwitchCombo(EventEntity):
+    """Fires when its sources are pressed in sequence or together, within the combo window."""
+
+    should_poll = False
+
+    def __init__(self, device, conf):
+        """Initialize the event entity."""
+        self._device = device
+        self._conf = None
+        self._matcher = None
+        self._remove_matcher = None
+        self._attr_name = conf[CONF_NAME]
+        self._attr_unique_id = "{}_combo".format(conf[CONF_UNIQUE_ID])
+        self.async_update_config(conf)
+
+    @property
+    def device_info(self):
+        """Information about this entity/device."""
+        return {
+            "identifiers": {(DOMAIN, self._device.device_id)},
+            "name": self._device.name,
+            "sw_version": self._device.firmware_version,
+            "model": self._device.model,
+            "manufacturer": self._device.manufacturer
+        }
+
+    async def async_added_to_hass(self):
+        """Run when this Entity has been added to HA."""
+        self._async_start()
+        self.async_on_remove(self._async_stop)
+
+    @callback
+    def async_update_config(self, conf) -> None:
+        """Match the changed sources, mode or window from now on."""
+        if conf == self._conf:
+            return
+        self._conf = conf
+        self._attr_event_types = [conf[CONF_COMBO_MODE]]
+        self._matcher = ComboMatcher(
+            conf[CONF_COMBO_MODE], conf[CONF_COMBO_SOURCES],
+            conf.get(CONF_COMBO_WINDOW, DEFAULT_COMBO_WINDOW), self._async_matched)
+        if self._remove_matcher is not None:
+            self._async_stop()
+            self._async_start()
+            self.async_write_ha_state()
+
+    @callback
+    def _async_start(self) -> None:
+        self._remove_matcher = self.hass.data[DOMAIN][DATA_PRESS_INDEX].async_add(self._matcher)
+
+    @callback
+    def _async_stop(self) -> None:
+        if self._remove_matcher is not None:
+            self._remove_matcher()
+            self._remove_matcher = None
+
+    @callback
+    def _async_matched(self, times) -> None:
+        self._trigger_event(self._conf[CONF_COMBO_MODE], {
+            "sources": list(self._matcher.sources),
+            "presses": [dt_util.utc_from_timestamp(t).isoformat() for t in times],
+        })
+        self.async_write_ha_state()
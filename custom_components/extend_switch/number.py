@@ -7,18 +7,24 @@
 # battery), the unit_of_measurement should match what's expected.
 import logging
 import time
-from threading import Timer
 from xmlrpc.client import boolean
 from homeassistant.const import (
-    STATE_UNKNOWN, STATE_UNAVAILABLE,
+    STATE_UNKNOWN, STATE_UNAVAILABLE, STATE_ON,
 )
 
-import asyncio
+from types import MappingProxyType
 from .const import *
+from .stats import SwitchStats
+from .decoder import GesturePatterns, parse_patterns, SwitchDecoder, HOLD
+from .predicates import compile_press_match
+from .auto_off import BREAKER_OPEN, BREAKER_HALF_OPEN, BREAKER_CLOSED
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.core import Event, EventStateChangedData, callback
+from homeassistant.core import callback
 from homeassistant.components.number import NumberEntity
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,33 +36,85 @@ _LOGGER = logging.getLogger(__name__)
 
 ENTITY_ID_FORMAT = DOMAIN + ".{}"
 
+# worst first, a switch shows the worst breaker of its sources
+_BREAKER_ORDER = (BREAKER_OPEN, BREAKER_HALF_OPEN, BREAKER_CLOSED)
+
+
+def switch_key(conf):
+    """Return what identifies a configured switch across option changes."""
+    if CONF_UNIQUE_ID in conf:
+        return conf[CONF_UNIQUE_ID]
+    return (conf[CONF_SWITCH_ENTITY], conf[CONF_NAME])
+
+
+def compile_patterns(text):
+    """Return the compiled gesture patterns of a switch, None without patterns."""
+    try:
+        patterns = parse_patterns(text)
+    except ValueError as err:
+        # stored before the flow rejected it, e.g. L and H after the same presses
+        _LOGGER.warning("gesture patterns ignored : %s", err)
+        return None
+    if not patterns:
+        return None
+    return GesturePatterns(patterns)
+
+
+def gesture_signal(entry_id, key):
+    """Return the dispatcher signal the gestures of a switch are sent on."""
+    return SIGNAL_GESTURE.format(entry_id, key)
+
+
+async def async_remove_entity(hass, entity, domain) -> None:
+    """Remove entity and its registry entry, also when it was never added (disabled).
+
+    Only an entity still live on its platform is removed, one Home Assistant
+    already removed (its registry entry was deleted) is not removed twice.
+    """
+    platform = entity.platform
+    if platform is not None and platform.entities.get(entity.entity_id) is entity:
+        await entity.async_remove(force_remove=True)
+    registry = er.async_get(hass)
+    entity_id = registry.async_get_entity_id(domain, DOMAIN, entity.unique_id)
+    if entity_id is not None:
+        registry.async_remove(entity_id)
+
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
 
-    hass.data[DOMAIN][config_entry.entry_id]["listener"] = []
-    
     device = Device(NAME, config_entry)
-
-    new_devices = []
-
-    if config_entry.options.get(CONF_SWITCHES) != None:
-        for entity in config_entry.options.get(CONF_SWITCHES):
-            new_devices.append(
-                ExtendSwitch(
-                    hass,
-                    config_entry.entry_id,
-                    device,
-                    entity[CONF_NAME],
-                    entity[CONF_SWITCH_ENTITY],
-                    entity[CONF_PUSH_WAIT_TIME],
-                    entity[CONF_PUSH_MAX]
-                )
-            )
+    entities = hass.data[DOMAIN][config_entry.entry_id]["switches"]
+
+    async def async_apply_options(entry):
+        """Create, remove or reconfigure only the switches that changed."""
+        configs = {switch_key(conf): conf for conf in entry.options.get(CONF_SWITCHES) or []}
+
+        for key in [key for key in entities if key not in configs]:
+            _LOGGER.debug("remove switch : %s", key)
+            hass.data[DOMAIN][entry.entry_id]["stats"].pop(key, None)
+            await async_remove_entity(hass, entities.pop(key), "number")
+
+        new_devices = []
+        started = time.perf_counter()
+        for key, conf in configs.items():
+            entity = entities.get(key)
+            if entity is not None:
+                entity.async_update_config(conf)
+                continue
+            entity = ExtendSwitch(hass, entry.entry_id, device, conf)
+            entities[key] = entity
+            new_devices.append(entity)
 
         if new_devices:
+            elapsed = (time.perf_counter() - started) * 1000
+            _LOGGER.debug("created %d switches in %.3f ms, %.3f ms per switch",
+                          len(new_devices), elapsed, elapsed / len(new_devices))
             async_add_devices(new_devices)
 
+    await async_apply_options(config_entry)
+    hass.data[DOMAIN][config_entry.entry_id]["option_listeners"].append(async_apply_options)
+
 class Device:
     """Dummy roller (device for HA) for Hello World example."""
 
@@ -64,8 +122,6 @@ class Device:
         """Init dummy roller."""
         self._id = f"{name}_{config.entry_id}"
         self._name = name
-        self._callbacks = set()
-        self._loop = asyncio.get_event_loop()
         # Reports if the roller is moving up or down.
         # >0 is up, <0 is down. This very much just for demonstration.
 
@@ -83,26 +139,6 @@ class Device:
     def name(self):
         return self._name
 
-    def register_callback(self, callback):
-        """Register callback, called when Roller changes state."""
-        self._callbacks.add(callback)
-
-    def remove_callback(self, callback):
-        """Remove previously registered callback."""
-        self._callbacks.discard(callback)
-
-    # In a real implementation, this library would call it's call backs when it was
-    # notified of any state changeds for the relevant device.
-    async def publish_updates(self):
-        """Schedule call all registered callbacks."""
-        for callback in self._callbacks:
-            callback()
-
-    def publish_updates(self):
-        """Schedule call all registered callbacks."""
-        for callback in self._callbacks:
-            callback()
-
 # This base class shows the common properties and methods for a sensor as used in this
 # example. See each sensor for further details about properties and methods that
 # have been overridden.
@@ -140,119 +176,363 @@ class NumberBase(NumberEntity):
         """Return True if roller and hub is available."""
         return True
 
-    async def async_added_to_hass(self):
-        """Run when this Entity has been added to HA."""
-        # Sensors should also register callbacks to HA when their state changes
-        self._device.register_callback(self.schedule_update_ha_state)
-
-    async def async_will_remove_from_hass(self):
-        """Entity being removed from hass."""
-        # The opposite of async_added_to_hass. Remove any registered call backs here.
-        self._device.remove_callback(self.schedule_update_ha_state)
-
 
-class ExtendSwitch(NumberBase):
+class ExtendSwitch(NumberBase, RestoreEntity):
     """Representation of a Thermal Comfort Sensor."""
 
-    def __init__(self, hass, entry_id, device, entity_name, switch_entity, push_wait_time, push_max):
+    # change with every press or gesture, not worth a recorder row each
+    _unrecorded_attributes = frozenset(
+        {"switch state", "press times", "adaptive wait time", "gesture sequence"})
+
+    def __init__(self, hass, entry_id, device, conf):
         """Initialize the sensor."""
         super().__init__(device)
+        switch_entity = conf[CONF_SWITCH_ENTITY]
+        key = switch_key(conf)
 
         self.hass = hass
-        self._switch_entity = switch_entity
-
+        self._entry_id = entry_id
         self.entity_id = async_generate_entity_id(
             ENTITY_ID_FORMAT, "{}_{}".format(switch_entity, NAME), hass=hass)
-        self._name = "{}".format(entity_name)
-        # self._name = "{} {}".format(device.device_id, SENSOR_TYPES[sensor_type][1])
+        self._name = "{}".format(conf[CONF_NAME])
         self._unit_of_measurement = "push"
-        self._state = None
-        self._attributes = {}
-        self._attributes["original entity id"] = switch_entity
-        self._attributes["push wait time"] = push_wait_time
-        self._icon = None
-        self._entity_picture = None
-        self._reset_timer = None
-        self._push_wait_time = push_wait_time
-        self._push_count = NUMBER_MIN
-        self._push_max = push_max
-        self._value = NUMBER_MIN
-        self._force_off = False
-
-        # self._device_class = SENSOR_TYPES[sensor_type][0]
-        self._unique_id = self.entity_id
-        self._device = device
+        self._scheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+        self._auto_off = hass.data[DOMAIN][DATA_AUTO_OFF]
+        # entity_id -> SharedSource of every source, filled while added to hass
+        self._shared = {}
+        self._write_handle = None
+        self._gesture_signal = gesture_signal(entry_id, key)
+        self._stats = hass.data[DOMAIN][entry_id]["stats"].setdefault(key, SwitchStats())
+        # the decoder state lives in the entry's decoder table, the entity only drives it
+        self._decoder = hass.data[DOMAIN][entry_id]["decoders"].setdefault(
+            key, SwitchDecoder(switch_entity, PRESS_RING_SIZE))
+        self._conf = None
+        self.async_update_config(conf)
+        # read only attributes, built again only once something they show changed
+        self._attributes = None
+
+        # switches added before the unique id was stored keep the generated one
+        self._unique_id = conf.get(CONF_UNIQUE_ID, self.entity_id)
 
         self._attr_native_step = NUMBER_STEP
         self._attr_native_min_value = NUMBER_MIN
         self._attr_native_max_value = NUMBER_MAX
 
-        hass.data[DOMAIN][entry_id]["listener"].append(async_track_state_change_event(
-            self.hass, switch_entity, self.switch_entity_listener))
-        state = self.hass.states.get(switch_entity)
+    @callback
+    def async_source_changed(self, source, old_state, new_state, echo, toggled):
+        """Handle a state change of source, echo and toggled are found once per source."""
+        if old_state is None or new_state is None:
+            self._stats.ignored += 1
+            return
+        _LOGGER.debug("call async_source_changed, old state : %s, new_state : %s",
+                      old_state.state, new_state.state)
+        decoder = self._decoder
+        if echo:
+            # caused by our own turn off, a press in between still counts
+            decoder.source_state = new_state.state
+            self._attributes = None
+            self._stats.echoes += 1
+            _LOGGER.debug("return echo")
+            return
+        if decoder.press_match is not None:
+            # stateless source, its compiled predicate alone decides
+            if not decoder.press_match(old_state, new_state):
+                self._stats.ignored += 1
+                return
+            decoder.source_state = new_state.state
+            self._attributes = None
+            # an attribute change does not move last_changed
+            pressed_at = new_state.last_updated_timestamp
+            if decoder.duplicate(source, pressed_at):
+                self._stats.duplicates += 1
+                return
+            if decoder.bounced(pressed_at, source):
+                self._stats.bounces += 1
+                return
+            self._async_press(pressed_at)
+            return
+        if not toggled:
+            if new_state.state != old_state.state:
+                self._stats.ignored += 1
+            return
+        decoder.source_state = new_state.state
+        self._attributes = None
+        # when the source changed, not when this callback got to run
+        pressed_at = new_state.last_changed_timestamp
+        if decoder.duplicate(source, pressed_at):
+            # the same press seen through another source of this switch
+            self._stats.duplicates += 1
+            return
+        if decoder.bounced(pressed_at, source):
+            self._stats.bounces += 1
+            return
+        if decoder.patterns is not None:
+            self._stats.presses += 1
+            self._async_pattern_edge(new_state.state == STATE_ON, pressed_at)
+            return
+        self._async_press(pressed_at)
 
-        if _is_valid_state(state):
-            self._attributes["switch state"] = state.state
-            self._switch_state = state.state
-            if state.state == "on":
-                self._force_off = True
-                self.hass.services.call('homeassistant', 'turn_off', {
-                                        "entity_id": self._switch_entity}, False)
+    @callback
+    def _async_press(self, pressed_at) -> None:
+        """Count one press of the source."""
+        decoder = self._decoder
+        self._stats.presses += 1
+        if decoder.closed_before(pressed_at):
+            # the window had closed before this press, only the timer is late
+            self._scheduler.async_cancel(self)
+            self._async_reset()
+        decoder.press(pressed_at)
+        self._async_counted(pressed_at)
 
     @callback
-    def switch_entity_listener(self, event:Event):
-        entity = event.data["entity_id"]
-        old_state = event.data["old_state"]
-        new_state = event.data["new_state"]
-        try:
-            _LOGGER.debug("call switch_entity_listener, old state : %s, new_state : %s",
-                          old_state.state, new_state.state)
-            """Handle temperature device state changes."""
-            if _is_valid_state(new_state):
-                if (new_state.state == "on" or new_state.state == "off") and (old_state.state == "on" or old_state.state == "off"):
-                    if new_state.state != old_state.state:
-                        if self._force_off == True:
-                            self._force_off = False
-                            _LOGGER.debug("return force off")
-                            return
-                        self._attributes["switch state"] = new_state.state
-                        self.set_native_value(int(self._push_count + 1))
-
-                        # 이걸 count가 올라갈때만 처리 해야 할지 고민
-                        #self.schedule_update_ha_state(True)
-        except:
-            ''
-
-    def set_native_value(self, value: float) -> None:
-        self._push_count = int(min(self._push_max, int(value)))
-        _LOGGER.debug("call set value : %f", self._push_count)
-        if int(self._push_count) != 0:
-            if self._reset_timer != None:
-                self._reset_timer.cancel()
-            self._reset_timer = Timer(self._push_wait_time/1000, self.reset)
-            self._reset_timer.start()
-
-    def reset(self) -> None:
-        self._value = self._push_count
-        self._device.publish_updates()
-        time.sleep(0.1)
-        self._push_count = NUMBER_MIN
-        self._value = NUMBER_MIN
-
-        state = self.hass.states.get(self._switch_entity)
-        if _is_valid_state(state):
-            if state.state == "on":
-                _LOGGER.debug("set force off")
-                self._force_off = True
-                self.hass.services.call('homeassistant', 'turn_off', {
-                                        "entity_id": self._switch_entity}, False)
-
-        # 여기에 있었지만 위치 바꿈
-        self._device.publish_updates()
+    def _async_pattern_edge(self, pressed, pressed_at) -> None:
+        """Turn the on/off edges of a momentary source into pattern symbols."""
+        decoder = self._decoder
+        if pressed:
+            can_hold = decoder.pattern_press(pressed_at)
+            if decoder.push_count:
+                # keep the gesture open while the button is held
+                decoder.deadline = self._scheduler.async_schedule(
+                    self, (decoder.push_wait_time + decoder.long_press_time) / 1000,
+                    self._async_reset)
+            if can_hold:
+                held = time.time() - pressed_at
+                self._scheduler.async_schedule(
+                    (self, HOLD), max(0, decoder.long_press_time / 1000 - held),
+                    self._async_hold)
+            return
+
+        self._scheduler.async_cancel((self, HOLD))
+        if decoder.pattern_release(pressed_at):
+            self._async_counted(pressed_at)
+
+    @callback
+    def _async_hold(self) -> None:
+        """The button is still held after the long press time."""
+        if self._decoder.pattern_hold():
+            # a hold ends its pattern, report it while the button is still held
+            self._scheduler.async_cancel(self)
+            self._decoder.deadline = self.hass.loop.time()
+            self._async_reset(turn_off=False)
+        else:
+            self._async_counted()
+
+    @callback
+    def async_update_config(self, conf) -> None:
+        """Apply changed options, the running gesture keeps its window."""
+        if conf == self._conf:
+            return
+        _LOGGER.debug("reconfigure %s, wait : %s, max : %s",
+                      self.entity_id, conf[CONF_PUSH_WAIT_TIME], conf[CONF_PUSH_MAX])
+        self._conf = conf
+        self._decoder.configure(
+            conf[CONF_PUSH_WAIT_TIME], conf[CONF_PUSH_MAX],
+            push_wait_min=conf.get(CONF_PUSH_WAIT_MIN, DEFAULT_PUSH_WAIT_MIN),
+            long_press_time=conf.get(CONF_LONG_PRESS_TIME, DEFAULT_LONG_PRESS_TIME),
+            patterns=compile_patterns(conf.get(CONF_PATTERNS)),
+            adaptive=conf.get(CONF_ADAPTIVE_WAIT, False),
+            optimistic=conf.get(CONF_OPTIMISTIC, False),
+            debounce_time=conf.get(CONF_DEBOUNCE_TIME, DEFAULT_DEBOUNCE_TIME),
+            sources=conf.get(CONF_EXTRA_SOURCES),
+            source_skew=conf.get(CONF_SOURCE_SKEW, DEFAULT_SOURCE_SKEW))
+        self._decoder.output_mode = conf.get(CONF_OUTPUT_MODE, OUTPUT_MODE_PULSE)
+        self._decoder.press_match = compile_press_match(conf.get(CONF_PRESS_MATCH))
+        self._attributes = None
+        if self._shared:
+            self._async_attach()
+        if self.hass is not None and self.platform is not None:
+            self._async_schedule_write()
+
+    async def async_set_native_value(self, value: float) -> None:
+        decoder = self._decoder
+        if int(value) > decoder.push_max:
+            self._stats.clamped += 1
+        decoder.push_count = int(min(decoder.push_max, int(value)))
+        _LOGGER.debug("call set value : %f", decoder.push_count)
+        if decoder.push_count:
+            decoder.window = decoder.wait_window()
+            self._async_counted()
+
+    @callback
+    def _async_counted(self, pressed_at=None) -> None:
+        """Arm the window of the counted press, or commit when the count is complete."""
+        decoder = self._decoder
+        if decoder.complete:
+            # no higher count can follow, commit without waiting
+            self._scheduler.async_cancel(self)
+            decoder.deadline = self.hass.loop.time()
+            self._async_reset()
+            return
+        delay = decoder.window
+        if pressed_at is not None:
+            # the window runs from the press, time spent reaching us is already gone
+            delay = max(0, delay - (time.time() - pressed_at))
+        decoder.deadline = self._scheduler.async_schedule(self, delay, self._async_reset)
+        if decoder.optimistic and decoder.push_count == 1:
+            # answer a single press right away, a higher count upgrades it later
+            self._async_emit(1, False)
+
+    @property
+    def reset_deadline(self):
+        """Return the event loop time the running gesture window closes at."""
+        return self._scheduler.deadline(self)
+
+    @callback
+    def _async_reset(self, turn_off=True) -> None:
+        """Commit the gesture: publish the count, then return to 0.
+
+        turn_off is False for a hold, the button is still pressed and the
+        source goes off by itself once it is released.
+        """
+        decoder = self._decoder
+        if decoder.press_started is not None:
+            # held past the window without becoming a hold, its release arms the window again
+            decoder.deadline = self._scheduler.async_schedule(
+                self, decoder.long_press_time / 1000, self._async_reset)
+            return
+        count = decoder.push_count
+        decoder.sequence += 1
+        self._async_emit(count, True)
+        decoder.commit()
+        if decoder.output_mode == OUTPUT_MODE_PULSE:
+            # the count is written first, 0 follows on the next loop iteration
+            self.hass.loop.call_soon(self._async_clear)
+
+        now = self.hass.loop.time()
+        jitter = (now - decoder.deadline) * 1000
+        self._stats.gestures += 1
+        self._stats.timer_jitter.add(jitter)
+        if decoder.presses.latest is not None:
+            self._stats.press_to_count.add((time.time() - decoder.presses.latest) * 1000)
+        _LOGGER.debug("publish count : %d, %.3f ms after the window closed", count, jitter)
+
+        if turn_off and decoder.press_match is None:
+            # back to the idle "off", unless another switch is still counting on a source,
+            # the sources of one switch are requested in the same window and share a call
+            window = self.hass.data[DOMAIN][self._entry_id][CONF_AUTO_OFF_WINDOW]
+            for shared in self._shared.values():
+                shared.async_gesture_done(window / 1000)
+
+    @property
+    def busy(self) -> bool:
+        """Return True in a gesture on a source that is turned off after it."""
+        return self._decoder.push_count != 0 and self._decoder.press_match is None
+
+    @callback
+    def _async_emit(self, count, final) -> None:
+        """Publish a count, final is False for an optimistic single press."""
+        decoder = self._decoder
+        gesture = {
+            "count": count,
+            "sequence": decoder.sequence,
+            "source": decoder.source,
+            "presses": [
+                dt_util.utc_from_timestamp(pressed_at).isoformat()
+                for pressed_at in decoder.presses.since(decoder.gesture_first)
+            ],
+        }
+        if decoder.patterns is not None:
+            gesture["pattern"] = decoder.last_pattern = decoder.pattern
+        if decoder.optimistic:
+            gesture["final"] = decoder.last_final = final
+        self._attributes = None
+        async_dispatcher_send(self.hass, self._gesture_signal, gesture)
+        if decoder.output_mode != OUTPUT_MODE_EVENT:
+            decoder.value = count
+            self._async_schedule_write()
+
+    @callback
+    def async_turn_off_done(self) -> None:
+        """Show the breaker of the sources once a turn off completed."""
+        breaker = self._breaker()
+        if not self._shared or breaker is None:
+            return
+        shown = self.extra_state_attributes
+        if (shown.get("turn off failures") != breaker[1]
+                or shown.get("turn off breaker") != breaker[0]):
+            self._attributes = None
+            self._async_schedule_write()
+
+    def _breaker(self):
+        """Return the worst breaker state of the sources and their failures, None without any."""
+        now = self.hass.loop.time()
+        breakers = [breaker for breaker in map(self._auto_off.breaker, self._decoder.sources)
+                    if breaker is not None]
+        if not breakers:
+            return None
+        states = [breaker.state(now) for breaker in breakers]
+        state = min(states, key=_BREAKER_ORDER.index)
+        return state, sum(breaker.failures for breaker in breakers)
+
+    @callback
+    def _async_clear(self) -> None:
+        self._decoder.value = NUMBER_MIN
+        self._async_schedule_write()
+
+    @callback
+    def _async_schedule_write(self) -> None:
+        """Write the state of this entity once, however often it changed in this tick."""
+        if self._write_handle is None:
+            self._write_handle = self.hass.loop.call_soon(self._async_flush_write)
+
+    @callback
+    def _async_flush_write(self) -> None:
+        self._write_handle = None
+        self.async_write_ha_state()
+
     # def unique_id(self):
     #    """Return Unique ID string."""
     #    return self.unique_id
 
+    async def async_added_to_hass(self):
+        """Run when this Entity has been added to HA."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            # keep counting up across restarts
+            sequence = last_state.attributes.get("gesture sequence")
+            if isinstance(sequence, int) and sequence > self._decoder.sequence:
+                self._decoder.sequence = sequence
+                self._attributes = None
+        self._async_attach()
+
+        state = self.hass.states.get(self._decoder.source)
+        if _is_valid_state(state):
+            self._decoder.source_state = state.state
+            self._attributes = None
+
+    @callback
+    def _async_attach(self) -> None:
+        """Decode exactly the configured sources, the new ones found on are turned off."""
+        shared_sources = self.hass.data[DOMAIN][DATA_SHARED_SOURCES]
+        sources = self._decoder.sources
+        for source in [source for source in self._shared if source not in sources]:
+            shared_sources.async_remove(source, self)
+            del self._shared[source]
+        for source in sources:
+            if source in self._shared:
+                continue
+            shared = self._shared[source] = shared_sources.async_add(source, self)
+            state = self.hass.states.get(source)
+            if (_is_valid_state(state) and state.state == STATE_ON
+                    and self._decoder.press_match is None):
+                # idle is "off", turned off in the background with the other sources
+                shared.async_reconcile(self.hass.data[DOMAIN][self._entry_id]["reconciler"])
+
+    async def async_will_remove_from_hass(self):
+        """Entity being removed from hass."""
+        await super().async_will_remove_from_hass()
+        shared_sources = self.hass.data[DOMAIN][DATA_SHARED_SOURCES]
+        for source in self._shared:
+            shared_sources.async_remove(source, self)
+        self._shared = {}
+        self.hass.data[DOMAIN][self._entry_id]["decoders"].pop(switch_key(self._conf), None)
+        self._scheduler.async_cancel(self)
+        self._scheduler.async_cancel((self, HOLD))
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+
     """Sensor Properties"""
 
     @property
@@ -263,6 +543,32 @@ class ExtendSwitch(NumberBase):
     @property
     def extra_state_attributes(self):
         """Return entity specific state attributes."""
+        if self._attributes is None:
+            decoder = self._decoder
+            attributes = {
+                "original entity id": decoder.source,
+                "push wait time": decoder.push_wait_time,
+            }
+            if len(decoder.sources) > 1:
+                attributes["source entities"] = list(decoder.sources)
+            if decoder.source_state is not None:
+                attributes["switch state"] = decoder.source_state
+            if decoder.estimator is not None:
+                attributes["adaptive wait time"] = round(decoder.wait_window() * 1000)
+            if decoder.patterns is not None:
+                attributes["gesture"] = decoder.last_pattern
+            if decoder.optimistic:
+                attributes["final"] = decoder.last_final
+            if decoder.output_mode == OUTPUT_MODE_LATCHED:
+                # the count stays until the next gesture, this tells two equal ones apart
+                attributes["gesture sequence"] = decoder.sequence
+            if decoder.presses.count:
+                attributes["press times"] = [
+                    round(pressed_at, 3) for pressed_at in decoder.presses.since(0)]
+            breaker = self._breaker()
+            if breaker is not None:
+                attributes["turn off breaker"], attributes["turn off failures"] = breaker
+            self._attributes = MappingProxyType(attributes)
         return self._attributes
 
     @property
@@ -284,13 +590,13 @@ class ExtendSwitch(NumberBase):
     def state(self):
         """Return the state of the sensor."""
         # return self._state
-        return self._value
+        return self._decoder.value
 
     @property
     def native_value(self):
         """Return the state of the sensor."""
         # return self._state
-        return self._value
+        return self._decoder.value
 
     # @property
     # def device_class(self) -> Optional[str]:
@@ -0,0 +1,73 @@
+"""Press predicates of the sources that are not on/off switches.
+
+Only the standard library is used, the states are read through their
+``state`` and ``attributes`` like Home Assistant's State objects.
+"""
+
+_NO_STATE = frozenset(("unknown", "unavailable"))
+
+
+def compile_press_match(text):
+    """Compile a press match into predicate(old_state, new_state), raises ValueError.
+
+    None is returned for an empty text: the source is an on/off switch whose
+    toggles are counted and that is turned back off after each gesture.
+    Otherwise the source is stateless, every change the predicate accepts is
+    a press and nothing is turned off:
+
+    - ``*``: any change of the state, for buttons and event entities whose
+      state is the time of the last press
+    - ``state=a|b``: the state changes to a or b
+    - ``attr:name``: the attribute name changes to another value
+    - ``attr:name=a|b``: the attribute name changes to a or b, compared as
+      text so numbers match too
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    if text == "*":
+        def any_change(old_state, new_state):
+            return (new_state.state != old_state.state
+                    and new_state.state not in _NO_STATE and old_state.state not in _NO_STATE)
+        return any_change
+
+    kind, sep, rest = text.partition(":") if text.startswith("attr:") else text.partition("=")
+    if kind == "state" and sep:
+        values = _values(rest, text)
+
+        def state_in(old_state, new_state):
+            return new_state.state in values and new_state.state != old_state.state
+        return state_in
+
+    if kind == "attr" and sep:
+        name, sep, rest = rest.partition("=")
+        name = name.strip()
+        if not name:
+            raise ValueError("attribute name missing : {}".format(text))
+        if not sep:
+            def attribute_changed(old_state, new_state):
+                value = new_state.attributes.get(name)
+                return value is not None and value != old_state.attributes.get(name)
+            return attribute_changed
+
+        values = _values(rest, text)
+
+        def attribute_in(old_state, new_state):
+            # other attributes (linkquality, battery) change while this one keeps its value
+            value = new_state.attributes.get(name)
+            if value is None:
+                return False
+            value = str(value)
+            old_value = old_state.attributes.get(name)
+            return value in values and (old_value is None or str(old_value) != value)
+        return attribute_in
+
+    raise ValueError("press match must be *, state=a|b, attr:name or attr:name=a|b : {}".format(text))
+
+
+def _values(text, item):
+    values = frozenset(value.strip() for value in text.split("|") if value.strip())
+    if not values:
+        raise ValueError("values missing : {}".format(item))
+    return values
@@ -0,0 +1,155 @@
+"""Shared press index of the sources used by the multi-switch combos."""
+from collections import deque
+import logging
+
+from homeassistant.const import STATE_ON, STATE_OFF
+from homeassistant.core import callback
+
+from .const import COMBO_SEQUENCE
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# presses kept per source, the longest sequence repeating one source can use
+PRESS_INDEX_SIZE = 8
+
+_TOGGLE_STATES = frozenset((STATE_ON, STATE_OFF))
+
+
+class ComboMatcher:
+    """A sequence or chord of sources pressed within window milliseconds.
+
+    A sequence needs its sources pressed in order, so it can only end with a
+    press of its last source; a chord takes them in any order and can end
+    with any of them. triggers tells the index which sources to check it on.
+    Presses already used by a match do not count again.
+    """
+
+    __slots__ = ("sequence", "sources", "window", "triggers", "action", "last_fired")
+
+    def __init__(self, mode, sources, window, action):
+        self.sequence = mode == COMBO_SEQUENCE
+        self.sources = tuple(sources)
+        self.window = window / 1000
+        if self.sequence:
+            self.triggers = (self.sources[-1],)
+        else:
+            self.triggers = tuple(dict.fromkeys(self.sources))
+        self.action = action
+        self.last_fired = float("-inf")
+
+    def check(self, presses, source, pressed_at) -> None:
+        """Check a press of source against the press index, run action on a match."""
+        if self.sequence:
+            times = self._match_sequence(presses, pressed_at)
+        else:
+            times = self._match_chord(presses, source, pressed_at)
+        if times is not None:
+            self.last_fired = pressed_at
+            self.action(times)
+
+    def _match_sequence(self, presses, pressed_at):
+        earliest = max(pressed_at - self.window, self.last_fired)
+        times = [pressed_at]
+        before = pressed_at
+        for source in reversed(self.sources[:-1]):
+            # the latest press of the previous source before the next one
+            found = None
+            for t in reversed(presses[source]):
+                if t < before:
+                    found = t
+                    break
+            if found is None or found < earliest or found == self.last_fired:
+                return None
+            times.append(found)
+            before = found
+        times.reverse()
+        return times
+
+    def _match_chord(self, presses, source, pressed_at):
+        earliest = max(pressed_at - self.window, self.last_fired)
+        times = [pressed_at]
+        for other in self.triggers:
+            if other == source:
+                continue
+            latest = presses[other][-1] if presses[other] else None
+            if latest is None or latest < earliest or latest == self.last_fired:
+                return None
+            times.append(latest)
+        times.sort()
+        return times
+
+
+class PressIndex:
+    """Latest presses of every source used by a combo, in time order.
+
+    A state change of a source appends its time to the deque of the source,
+    then only the matchers triggered by that source are checked, whatever
+    the number of combos. The sources are watched through the shared
+    SourceDispatcher while a matcher uses them.
+    """
+
+    def __init__(self, hass, sources, echo):
+        self.hass = hass
+        self._sources = sources
+        self._echo = echo
+        # source -> deque of press timestamps
+        self._presses = {}
+        # source -> matchers checked on its presses
+        self._matchers = {}
+        # source -> (matchers using it, remover of its SourceDispatcher listener)
+        self._watched = {}
+
+    @callback
+    def async_add(self, matcher):
+        """Start matching, returns the remover."""
+        for source in matcher.triggers:
+            self._matchers[source] = self._matchers.get(source, ()) + (matcher,)
+        for source in set(matcher.sources):
+            users, remove = self._watched.get(source, (0, None))
+            if remove is None:
+                self._presses[source] = deque(maxlen=PRESS_INDEX_SIZE)
+                remove = self._sources.async_add(source, self._async_state_changed)
+            self._watched[source] = (users + 1, remove)
+
+        @callback
+        def async_remove():
+            self._async_remove(matcher)
+
+        return async_remove
+
+    @callback
+    def _async_remove(self, matcher) -> None:
+        for source in matcher.triggers:
+            matchers = tuple(m for m in self._matchers.get(source, ()) if m is not matcher)
+            if matchers:
+                self._matchers[source] = matchers
+            else:
+                self._matchers.pop(source, None)
+        for source in set(matcher.sources):
+            users, remove = self._watched.pop(source)
+            if users > 1:
+                self._watched[source] = (users - 1, remove)
+            else:
+                remove()
+                del self._presses[source]
+
+    def presses(self, source):
+        """Return the indexed press times of source, oldest first."""
+        return list(self._presses.get(source, ()))
+
+    @callback
+    def _async_state_changed(self, event) -> None:
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        if old_state is None or new_state is None or new_state.state == old_state.state:
+            return
+        if new_state.state not in _TOGGLE_STATES or old_state.state not in _TOGGLE_STATES:
+            return
+        if self._echo.is_echo(new_state.context):
+            return
+        source = event.data["entity_id"]
+        pressed_at = new_state.last_changed_timestamp
+        self._presses[source].append(pressed_at)
+        for matcher in self._matchers.get(source, ()):
+            matcher.check(self._presses, source, pressed_at)
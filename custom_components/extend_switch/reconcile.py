@@ -0,0 +1,88 @@
+"""Background turn off of the sources found on at startup."""
+import asyncio
+import logging
+
+from homeassistant.core import callback
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class IdleReconciler:
+    """Return the sources of a config entry to their idle "off" state.
+
+    Switches queue their source once they are added to hass. A background
+    task sends the turn offs one by one, at most ``rate`` per second and with
+    at most ``concurrency`` calls in flight, so a restart with many sources on
+    does not stall the setup or flood the network.
+    """
+
+    def __init__(self, hass, concurrency, rate, auto_off):
+        self.hass = hass
+        # sends the calls, with its timeout, retries and breakers
+        self._auto_off = auto_off
+        self.concurrency = concurrency
+        self.rate = rate
+        # entity_id -> callback returning True when the source is still to turn off
+        self._queue = {}
+        self._task = None
+
+    @callback
+    def async_enqueue(self, entity_id, prepare) -> None:
+        """Queue entity_id, prepare is called right before its turn off is sent."""
+        self._queue[entity_id] = prepare
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), "extend_switch idle reconciliation")
+
+    @callback
+    def async_discard(self, entity_id) -> None:
+        """Forget a queued source."""
+        self._queue.pop(entity_id, None)
+
+    def __contains__(self, entity_id) -> bool:
+        """Return True while entity_id waits for its turn off."""
+        return entity_id in self._queue
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop the running reconciliation."""
+        self._queue.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        calls = set()
+        sent = 0
+        try:
+            while self._queue or calls:
+                if not self._queue:
+                    # sources queued while the last calls run are sent by this task too
+                    await asyncio.wait(calls, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                entity_id = next(iter(self._queue))
+                prepare = self._queue.pop(entity_id)
+                if not prepare() or not self._auto_off.allowed(entity_id):
+                    continue
+                await semaphore.acquire()
+                call = self.hass.async_create_background_task(
+                    self._async_turn_off(entity_id, semaphore),
+                    "extend_switch idle turn off {}".format(entity_id))
+                calls.add(call)
+                call.add_done_callback(calls.discard)
+                sent += 1
+                await asyncio.sleep(1 / self.rate)
+            _LOGGER.debug("idle reconciliation turned off %d sources", sent)
+        finally:
+            # a task cancelled at unload must not forget the one started after it
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def _async_turn_off(self, entity_id, semaphore) -> None:
+        try:
+            if await self._auto_off.async_turn_off([entity_id]):
+                _LOGGER.warning("idle reconciliation of %s failed", entity_id)
+        finally:
+            semaphore.release()
@@ -0,0 +1,60 @@
+"""Shared reset timer scheduler for the Extend Switch integration."""
+import logging
+
+from homeassistant.core import callback
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PressScheduler:
+    """Run the reset timers of every ExtendSwitch on the Home Assistant loop.
+
+    One instance is shared by all entities of the integration. Each key owns at
+    most one pending timer, armed with ``loop.call_at`` so no extra threads are
+    created. Re-arming or cancelling a key only cancels its previous handle,
+    which the event loop discards lazily in O(1).
+    """
+
+    def __init__(self, hass):
+        self._loop = hass.loop
+        self._handles = {}
+        self._deadlines = {}
+
+    @callback
+    def async_schedule(self, key, delay, action) -> float:
+        """(Re)arm the timer of key, returns the loop time it will fire at."""
+        handle = self._handles.get(key)
+        if handle is not None:
+            handle.cancel()
+        when = self._loop.time() + delay
+        self._deadlines[key] = when
+        self._handles[key] = self._loop.call_at(when, self._fire, key, action)
+        return when
+
+    @callback
+    def async_cancel(self, key) -> None:
+        """Cancel the pending timer of key, if any."""
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key):
+        """Return the loop time the timer of key fires at, or None."""
+        return self._deadlines.get(key)
+
+    def remaining(self, key):
+        """Return the seconds left before the timer of key fires, or None."""
+        when = self._deadlines.get(key)
+        if when is None:
+            return None
+        return max(0.0, when - self._loop.time())
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _fire(self, key, action) -> None:
+        self._handles.pop(key, None)
+        self._deadlines.pop(key, None)
+        action()
@@ -0,0 +1,87 @@
+"""Diagnostic counter sensors of the Extend Switch decoders."""
+import logging
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.helpers.entity import EntityCategory
+
+from .const import *
+from .number import Device, async_remove_entity, switch_key
+from .stats import COUNTERS, SwitchStats
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# the counters are read from memory, polling them is cheap
+SCAN_INTERVAL = timedelta(seconds=60)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Add the counter sensors of every switch, disabled by default."""
+
+    device = Device(NAME, config_entry)
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    sensors = {}
+
+    async def async_apply_options(entry):
+        """Add or remove the sensors of the switches that changed."""
+        configs = {switch_key(conf): conf for conf in entry.options.get(CONF_SWITCHES) or []}
+
+        for key in [key for key in sensors if key not in configs]:
+            for sensor in sensors.pop(key):
+                # disabled by default, most of them were never added
+                await async_remove_entity(hass, sensor, "sensor")
+
+        new_sensors = []
+        for key, conf in configs.items():
+            if key in sensors:
+                continue
+            stats = data["stats"].setdefault(key, SwitchStats())
+            sensors[key] = [
+                SwitchStatSensor(device, entry.entry_id, conf, stats, counter)
+                for counter in COUNTERS
+            ]
+            new_sensors.extend(sensors[key])
+
+        if new_sensors:
+            async_add_entities(new_sensors)
+
+    await async_apply_options(config_entry)
+    data["option_listeners"].append(async_apply_options)
+
+
+class SwitchStatSensor(SensorEntity):
+    """One counter of a switch."""
+
+    should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, device, entry_id, conf, stats, counter):
+        """Initialize the sensor."""
+        self._device = device
+        self._stats = stats
+        self._counter = counter
+        self._attr_name = "{} {}".format(conf[CONF_NAME], counter)
+        if CONF_UNIQUE_ID in conf:
+            self._attr_unique_id = "{}_{}".format(conf[CONF_UNIQUE_ID], counter)
+        else:
+            self._attr_unique_id = "{}_{}_{}_{}".format(
+                entry_id, conf[CONF_SWITCH_ENTITY], conf[CONF_NAME], counter)
+
+    @property
+    def device_info(self):
+        """Information about this entity/device."""
+        return {
+            "identifiers": {(DOMAIN, self._device.device_id)},
+            "name": self._device.name,
+            "sw_version": self._device.firmware_version,
+            "model": self._device.model,
+            "manufacturer": self._device.manufacturer
+        }
+
+    @property
+    def native_value(self):
+        """Return the counter value."""
+        return getattr(self._stats, self._counter)
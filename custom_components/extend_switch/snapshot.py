@@ -0,0 +1,81 @@
+"""Snapshot of every decoder in one call, as a service response and a websocket command."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+
+from .const import DOMAIN, DATA_SCHEDULER
+
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SNAPSHOT = "snapshot"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SOURCE = "source"
+ATTR_ACTIVE = "active"
+
+SNAPSHOT_FILTERS = {
+    vol.Optional(ATTR_ENTRY_ID): str,
+    vol.Optional(ATTR_SOURCE): str,
+    vol.Optional(ATTR_ACTIVE, default=False): bool,
+}
+
+
+@callback
+def async_snapshot(hass: HomeAssistant, entry_id=None, source=None, active=False):
+    """Return the live state of the decoders, optionally of one entry or source.
+
+    active keeps only the decoders in the middle of a gesture. Reading the
+    decoder tables costs the same whatever the number of entities polled.
+    """
+    scheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+    decoders = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry_id is not None and entry.entry_id != entry_id:
+            continue
+        data = hass.data[DOMAIN].get(entry.entry_id)
+        if data is None:
+            continue
+        for key, decoder in data["decoders"].items():
+            if source is not None and source not in decoder.sources:
+                continue
+            if active and not decoder.push_count:
+                continue
+            entity = data["switches"].get(key)
+            decoders.append({
+                "entry_id": entry.entry_id,
+                "entity_id": entity.entity_id if entity is not None else None,
+                "source": decoder.source,
+                "sources": list(decoder.sources),
+                "source_state": decoder.source_state,
+                "push_count": decoder.push_count,
+                "remaining": scheduler.remaining(entity) if entity is not None else None,
+                "last_press": decoder.presses.latest,
+                "sequence": decoder.sequence,
+            })
+    return decoders
+
+
+@callback
+def async_setup_snapshot(hass: HomeAssistant) -> None:
+    """Register the snapshot service and websocket command."""
+
+    async def async_handle_snapshot(call: ServiceCall):
+        return {"decoders": async_snapshot(
+            hass, call.data.get(ATTR_ENTRY_ID), call.data.get(ATTR_SOURCE),
+            call.data[ATTR_ACTIVE])}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT, async_handle_snapshot,
+        schema=vol.Schema(SNAPSHOT_FILTERS), supports_response=SupportsResponse.ONLY)
+    websocket_api.async_register_command(hass, websocket_snapshot)
+
+
+@websocket_api.websocket_command({vol.Required("type"): "extend_switch/snapshot", **SNAPSHOT_FILTERS})
+@callback
+def websocket_snapshot(hass, connection, msg):
+    """Send the snapshot of the decoders."""
+    connection.send_result(msg["id"], {"decoders": async_snapshot(
+        hass, msg.get(ATTR_ENTRY_ID), msg.get(ATTR_SOURCE), msg[ATTR_ACTIVE])})
@@ -0,0 +1,170 @@
+"""Integration wide state change dispatcher for the watched source entities."""
+import logging
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_ON, STATE_OFF
+from homeassistant.core import callback
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_TOGGLE_STATES = frozenset((STATE_ON, STATE_OFF))
+
+
+class SourceDispatcher:
+    """Route the state changes of every watched source through one bus listener.
+
+    The decoders of each source are kept in a dict keyed by entity_id, so a
+    state change costs one lookup whatever the number of sources. Sources are
+    added and removed at runtime without touching the bus subscription.
+    """
+
+    def __init__(self, hass):
+        self.hass = hass
+        self._decoders = {}
+        self._unsub = None
+
+    @callback
+    def async_add(self, entity_id, decoder):
+        """Send the state changes of entity_id to decoder, returns the remover."""
+        self._decoders[entity_id] = self._decoders.get(entity_id, ()) + (decoder,)
+        if self._unsub is None:
+            self._unsub = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_dispatch, self._async_filter)
+
+        @callback
+        def async_remove():
+            self._async_remove(entity_id, decoder)
+
+        return async_remove
+
+    @property
+    def sources(self):
+        """Return the watched source entity ids."""
+        return list(self._decoders)
+
+    @callback
+    def _async_remove(self, entity_id, decoder) -> None:
+        decoders = tuple(d for d in self._decoders.get(entity_id, ()) if d != decoder)
+        if decoders:
+            self._decoders[entity_id] = decoders
+        else:
+            self._decoders.pop(entity_id, None)
+        if not self._decoders and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_filter(self, event_data) -> bool:
+        return event_data["entity_id"] in self._decoders
+
+    @callback
+    def _async_dispatch(self, event) -> None:
+        for decoder in self._decoders.get(event.data["entity_id"], ()):
+            decoder(event)
+
+
+class SharedSource:
+    """One source entity and every switch decoding it, across config entries.
+
+    A state change is classified once, echo and toggle, then fanned out to
+    the switches, each counting with its own push_max and window. The source
+    is turned off once, after the last running gesture on it ended, and is
+    queued once for the idle reconciliation.
+    """
+
+    def __init__(self, hass, entity_id, echo, auto_off):
+        self.hass = hass
+        self.entity_id = entity_id
+        self.switches = ()
+        self._echo = echo
+        self._auto_off = auto_off
+        self._unsub = None
+        self._reconciler = None
+
+    @callback
+    def _async_state_changed(self, event) -> None:
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        echo = toggled = False
+        if old_state is not None and new_state is not None:
+            echo = self._echo.is_echo(new_state.context)
+            toggled = (new_state.state != old_state.state
+                       and new_state.state in _TOGGLE_STATES and old_state.state in _TOGGLE_STATES)
+        for switch in self.switches:
+            switch.async_source_changed(self.entity_id, old_state, new_state, echo, toggled)
+
+    @property
+    def busy(self) -> bool:
+        """Return True while a switch turning this source off is in a gesture."""
+        return any(switch.busy for switch in self.switches)
+
+    @callback
+    def async_gesture_done(self, window) -> None:
+        """Turn the source off once no gesture on it is running anymore."""
+        if self.busy:
+            _LOGGER.debug("%s still in a gesture, turn off later", self.entity_id)
+            return
+        state = self.hass.states.get(self.entity_id)
+        if state is not None and state.state == STATE_ON:
+            self._auto_off.async_request(self.entity_id, window, self._async_turn_off_done)
+
+    @callback
+    def _async_turn_off_done(self) -> None:
+        for switch in self.switches:
+            switch.async_turn_off_done()
+
+    @callback
+    def async_reconcile(self, reconciler) -> None:
+        """Queue the source to be turned off in the background, once."""
+        # a reconciler cancelled at unload dropped its queue, the source is queued again
+        if self._reconciler is None or self.entity_id not in self._reconciler:
+            self._reconciler = reconciler
+            reconciler.async_enqueue(self.entity_id, self._async_prepare_idle)
+
+    @callback
+    def _async_prepare_idle(self) -> bool:
+        """Return True when the source is still on and must be turned off."""
+        self._reconciler = None
+        state = self.hass.states.get(self.entity_id)
+        return state is not None and state.state == STATE_ON and not self.busy
+
+
+class SharedSources:
+    """The SharedSource of every decoded source entity, reference counted by switch."""
+
+    def __init__(self, hass, dispatcher, echo, auto_off):
+        self.hass = hass
+        self._dispatcher = dispatcher
+        self._echo = echo
+        self._auto_off = auto_off
+        self._sources = {}
+
+    @callback
+    def async_add(self, entity_id, switch) -> SharedSource:
+        """Let switch decode entity_id, returns its SharedSource."""
+        shared = self._sources.get(entity_id)
+        if shared is None:
+            shared = self._sources[entity_id] = SharedSource(
+                self.hass, entity_id, self._echo, self._auto_off)
+            shared._unsub = self._dispatcher.async_add(entity_id, shared._async_state_changed)
+        shared.switches += (switch,)
+        return shared
+
+    @callback
+    def async_remove(self, entity_id, switch) -> None:
+        shared = self._sources.get(entity_id)
+        if shared is None:
+            return
+        shared.switches = tuple(s for s in shared.switches if s is not switch)
+        if shared.switches:
+            return
+        del self._sources[entity_id]
+        shared._unsub()
+        if shared._reconciler is not None:
+            shared._reconciler.async_discard(entity_id)
+
+    def get(self, entity_id):
+        return self._sources.get(entity_id)
+
+    def __len__(self):
+        return len(self._sources)
@@ -0,0 +1,54 @@
+"""Runtime counters and histograms of the Extend Switch decoders."""
+from bisect import bisect_left
+
+
+# upper bounds of the histogram buckets, in milliseconds
+JITTER_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+PRESS_TO_COUNT_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 5000)
+
+COUNTERS = ("presses", "gestures", "clamped", "echoes", "ignored", "bounces", "duplicates")
+
+
+class Histogram:
+    """Fixed bucket histogram, one bisect and one increment per sample."""
+
+    __slots__ = ("bounds", "counts")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def add(self, value) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+
+    def as_dict(self):
+        buckets = {"le_{}".format(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return buckets
+
+
+class SwitchStats:
+    """Counters of one switch.
+
+    presses: toggles counted, gestures: counts published, clamped: values
+    set on the number above push_max and cut down to it (a press reaching
+    push_max commits, the next one starts a new gesture), echoes: state
+    changes caused by our own turn off,
+    ignored: state changes that are not a press of the source, bounces: changes
+    dropped for following the previous one within debounce_time, duplicates:
+    presses another source of the switch already reported within source_skew.
+    """
+
+    __slots__ = COUNTERS + ("timer_jitter", "press_to_count")
+
+    def __init__(self):
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+        self.timer_jitter = Histogram(JITTER_BUCKETS)
+        self.press_to_count = Histogram(PRESS_TO_COUNT_BUCKETS)
+
+    def as_dict(self):
+        stats = {counter: getattr(self, counter) for counter in COUNTERS}
+        stats["timer_jitter_ms"] = self.timer_jitter.as_dict()
+        stats["press_to_count_ms"] = self.press_to_count.as_dict()
+        return stats
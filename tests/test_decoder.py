@@ -0,0 +1,168 @@
+"""Tests of the decoder, it only needs the standard library."""
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+_PATH = Path(__file__).parent.parent / "custom_components" / "extend_switch" / "decoder.py"
+_SPEC = importlib.util.spec_from_file_location("decoder", _PATH)
+decoder = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(decoder)
+
+
+def _decoder(push_wait_time=1000, push_max=3, **options):
+    switch = decoder.SwitchDecoder("switch.a", 4)
+    switch.configure(push_wait_time, push_max, **options)
+    return switch
+
+
+def test_parse_patterns():
+    assert decoder.parse_patterns("double=ss, long = L ,double_hold=SH") == {
+        "double": "SS", "long": "L", "double_hold": "SH"}
+    assert decoder.parse_patterns("") == {}
+    assert decoder.parse_patterns(None) == {}
+
+
+@pytest.mark.parametrize("text", [
+    "double", "=SS", "double=", "double=SX", "hold=HS", "a=SS, b=SS", "a=SS, a=SL",
+    # L and H after the same presses, the hold always fires first
+    "long=L, hold=H", "a=SLS, b=SH", "a=SSL, b=SSH",
+])
+def test_parse_patterns_rejects(text):
+    with pytest.raises(ValueError):
+        decoder.parse_patterns(text)
+
+
+def test_pattern_table_lookup():
+    patterns = decoder.GesturePatterns(decoder.parse_patterns("single=S, double=SS, long=L, triple_hold=SSH"))
+    table = patterns.table
+    state = table[0][decoder.SHORT]
+    assert patterns.accept[state] == "single"
+    state = table[state][decoder.SHORT]
+    assert patterns.accept[state] == "double"
+    assert patterns.accept[table[state][decoder.HOLD]] == "triple_hold"
+    assert table[state][decoder.SHORT] == decoder.DEAD
+    assert patterns.accept[table[0][decoder.LONG]] == "long"
+    assert table[0][decoder.HOLD] == decoder.DEAD
+    assert patterns.names == ["single", "double", "long", "triple_hold"]
+
+
+def test_pattern_press_release_and_hold():
+    switch = _decoder(patterns=decoder.GesturePatterns({"double": "SS", "long": "L", "double_hold": "SH"}),
+                      long_press_time=500)
+    assert not switch.pattern_press(10.0)  # no H after nothing
+    assert switch.pattern_release(10.1)
+    assert switch.pattern is None  # S alone is only a prefix
+    assert switch.pattern_press(10.3)  # H can follow S
+    assert switch.pattern_hold()
+    assert switch.pattern == "double_hold"
+    assert switch.push_count == 2
+    assert switch.commit() == 2
+    # the release of the hold is not a press of the next gesture
+    assert not switch.pattern_release(11.5)
+    assert switch.push_count == 0
+
+    switch.pattern_press(20.0)
+    assert switch.pattern_release(20.6)
+    assert switch.pattern == "long"
+
+
+def test_commit_clears_a_running_press():
+    switch = _decoder(patterns=decoder.GesturePatterns({"double": "SS"}))
+    switch.pattern_press(1.0)
+    switch.pattern_release(1.1)
+    switch.pattern_press(1.4)
+    switch.commit()
+    assert switch.press_started is None
+    assert not switch.pattern_release(3.0)
+
+
+def test_complete_at_push_max():
+    switch = _decoder(push_max=3)
+    for i, pressed_at in enumerate((1.0, 1.2, 1.4), 1):
+        assert not switch.complete
+        switch.press(pressed_at)
+        assert switch.push_count == i
+    assert switch.complete
+    assert switch.commit() == 3
+    assert switch.push_count == 0
+    assert not switch.complete
+    # the next press starts a new gesture
+    switch.press(1.6)
+    assert switch.push_count == 1
+
+
+def test_closed_before():
+    switch = _decoder(push_wait_time=500)
+    assert not switch.closed_before(1.0)
+    switch.press(1.0)
+    assert not switch.closed_before(1.4)
+    assert switch.closed_before(1.6)
+
+
+def test_debounce():
+    switch = _decoder(debounce_time=50)
+    assert not switch.bounced(1.0)
+    assert switch.bounced(1.03)
+    assert not switch.bounced(1.06)
+
+
+def test_duplicate_of_another_source():
+    switch = _decoder(sources=["switch.b"], source_skew=150)
+    assert switch.sources == ("switch.a", "switch.b")
+    assert not switch.duplicate("switch.a", 1.0)
+    assert not switch.bounced(1.0, "switch.a")
+    assert switch.duplicate("switch.b", 1.1)
+    assert not switch.duplicate("switch.b", 1.2)
+    assert not switch.duplicate("switch.a", 1.1)
+
+
+def test_fixed_window_without_adaptive():
+    switch = _decoder(push_wait_time=800)
+    assert switch.wait_window() == 0.8
+    switch.press(1.0)
+    assert switch.window == 0.8
+
+
+@pytest.mark.parametrize("interval", [0.05, 0.3, 0.7])
+def test_adaptive_window_within_bounds(interval):
+    switch = _decoder(push_wait_time=1000, push_max=100, push_wait_min=250, adaptive=True)
+    rng = random.Random(1)
+    pressed_at = 0.0
+    for _ in range(decoder.ADAPTIVE_MIN_SAMPLES - 1):
+        pressed_at += interval * rng.uniform(0.9, 1.1)
+        switch.press(pressed_at)
+    # too few intervals learned yet
+    assert switch.wait_window() == 1.0
+    for _ in range(200):
+        pressed_at += interval * rng.uniform(0.9, 1.1)
+        switch.press(pressed_at)
+    window = switch.wait_window()
+    assert 0.25 <= window <= 1.0
+    expected = interval * 1.1 * decoder.ADAPTIVE_MARGIN
+    assert window == pytest.approx(min(1.0, max(0.25, expected)), rel=0.1)
+    assert switch.window == window
+
+
+def test_p2_quantile():
+    estimator = decoder.P2Quantile(0.5)
+    assert estimator.value is None
+    rng = random.Random(2)
+    for _ in range(10000):
+        estimator.add(rng.uniform(0, 100))
+    assert estimator.value == pytest.approx(50, abs=3)
+
+
+def test_press_ring_wraparound():
+    ring = decoder.PressRing(4)
+    assert ring.latest is None
+    assert ring.since(0) == []
+    for t in range(1, 7):
+        ring.append(float(t))
+    assert ring.count == 6
+    assert ring.latest == 6.0
+    # only the last 4 are kept
+    assert ring.since(0) == [3.0, 4.0, 5.0, 6.0]
+    assert ring.since(4) == [5.0, 6.0]
+    assert ring.since(6) == []
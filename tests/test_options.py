@@ -0,0 +1,81 @@
+"""Option changes applied to the running switches, needs pytest-homeassistant-custom-component."""
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+from custom_components.extend_switch.const import (  # noqa: E402
+    CONF_ADD_ANODHER, CONF_NAME, CONF_PUSH_MAX, CONF_PUSH_WAIT_TIME, CONF_SWITCH_ENTITY,
+    CONF_SWITCHES, DOMAIN,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+def _switch(source, add_another=False):
+    return {
+        CONF_SWITCH_ENTITY: source,
+        CONF_NAME: source.split(".")[1],
+        CONF_PUSH_WAIT_TIME: 200,
+        CONF_PUSH_MAX: 3,
+        CONF_ADD_ANODHER: add_another,
+    }
+
+
+def _switch_entities(hass, entry):
+    """Return {source: entity_id} of the number entities of entry."""
+    registry = er.async_get(hass)
+    entities = {}
+    for reg_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if reg_entry.domain == "number":
+            state = hass.states.get(reg_entry.entity_id)
+            entities[state.attributes["original entity id"]] = reg_entry.entity_id
+    return entities
+
+
+async def test_remove_and_add_in_one_submission(hass):
+    """A switch removed and another added in the same options submission."""
+    assert await async_setup_component(hass, "homeassistant", {})
+    for source in ("switch.first", "switch.second", "switch.third"):
+        hass.states.async_set(source, "off")
+
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {})
+    entry = result["result"]
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_ADD_ANODHER: True})
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], _switch("switch.first", add_another=True))
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], _switch("switch.second"))
+    await hass.async_block_till_done()
+    entities = _switch_entities(hass, entry)
+    assert set(entities) == {"switch.first", "switch.second"}
+
+    # keep second, drop first and add third in the same submission
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_SWITCHES: [entities["switch.second"]], CONF_ADD_ANODHER: True})
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], _switch("switch.third"))
+    await hass.async_block_till_done()
+
+    assert [conf[CONF_SWITCH_ENTITY] for conf in entry.options[CONF_SWITCHES]] == [
+        "switch.second", "switch.third"]
+    assert set(_switch_entities(hass, entry)) == {"switch.second", "switch.third"}
+    assert hass.states.get(entities["switch.first"]) is None
+    assert er.async_get(hass).async_get(entities["switch.first"]) is None
+    assert set(hass.data[DOMAIN][entry.entry_id]["switches"]) == {
+        key for key in hass.data[DOMAIN][entry.entry_id]["decoders"]}
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
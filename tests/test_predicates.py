@@ -0,0 +1,56 @@
+"""Tests of the press predicates, they only need the standard library."""
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+_PATH = Path(__file__).parent.parent / "custom_components" / "extend_switch" / "predicates.py"
+_SPEC = importlib.util.spec_from_file_location("predicates", _PATH)
+predicates = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(predicates)
+
+
+def _state(state="on", **attributes):
+    return SimpleNamespace(state=state, attributes=attributes)
+
+
+def test_empty_is_toggle():
+    assert predicates.compile_press_match("") is None
+    assert predicates.compile_press_match(None) is None
+
+
+def test_attribute_in_needs_a_change():
+    match = predicates.compile_press_match("attr:action=single|double")
+    assert match(_state(action=""), _state(action="single"))
+    assert match(_state(action="single"), _state(action="double"))
+    assert match(_state(), _state(action="single"))
+    # linkquality or battery updates while action keeps its last value
+    assert not match(_state(action="single", linkquality=80), _state(action="single", linkquality=90))
+    assert not match(_state(action="single"), _state(action="hold"))
+    assert not match(_state(action="single"), _state())
+
+
+def test_attribute_in_compares_as_text():
+    match = predicates.compile_press_match("attr:button=1|2")
+    assert match(_state(button=0), _state(button=1))
+    assert not match(_state(button=1), _state(button=1))
+    assert not match(_state(button=1), _state(button="1"))
+
+
+def test_state_in():
+    match = predicates.compile_press_match("state=pressed")
+    assert match(_state("idle"), _state("pressed"))
+    assert not match(_state("pressed"), _state("pressed"))
+
+
+def test_any_change():
+    match = predicates.compile_press_match("*")
+    assert match(_state("2024-01-01T00:00:00"), _state("2024-01-01T00:00:01"))
+    assert not match(_state("unavailable"), _state("2024-01-01T00:00:01"))
+
+
+@pytest.mark.parametrize("text", ["attr:", "attr:name=", "state=", "other"])
+def test_invalid(text):
+    with pytest.raises(ValueError):
+        predicates.compile_press_match(text)
@@ -0,0 +1,44 @@
+"""Tests of the offline replay, it only needs the standard library."""
+import importlib.util
+from pathlib import Path
+
+_PATH = Path(__file__).parent.parent / "tools" / "replay.py"
+_SPEC = importlib.util.spec_from_file_location("replay", _PATH)
+replay = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(replay)
+
+
+def _single_presses(count, turn_off_after):
+    """Single presses 10 s apart, each turned back off turn_off_after seconds later."""
+    toggles = []
+    for i in range(count):
+        pressed_at = 1000.0 + i * 10
+        toggles.append((pressed_at, "on"))
+        toggles.append((pressed_at + turn_off_after, "off"))
+    return toggles
+
+
+def test_echo_is_not_ambiguous():
+    # the turn off comes 80 ms after a 1000 ms window: auto-off window plus device latency
+    toggles = _single_presses(10, 1.08)
+    for wait in (500, 750, 1000):
+        result = replay.replay("switch.a", toggles, wait, 3)
+        assert result["ambiguous"] == 0, wait
+        assert result["echoes"] == 10
+        assert result["counts"] == {1: 10}
+
+
+def test_press_at_the_window_edge_is_ambiguous():
+    toggles = [(1000.0, "on"), (1000.95, "off"), (1010.0, "on"), (1011.08, "off")]
+    result = replay.replay("switch.a", toggles, 1000, 3)
+    assert result["ambiguous"] == 1
+    assert result["counts"] == {1: 1, 2: 1}
+
+
+def test_complete_gesture_echo():
+    # push_max reached: committed at once, the following turn off is its echo
+    toggles = [(1000.0, "on"), (1000.3, "off"), (1000.6, "on"), (1000.7, "off")]
+    result = replay.replay("switch.a", toggles, 1000, 3)
+    assert result["counts"] == {3: 1}
+    assert result["echoes"] == 1
+    assert result["ambiguous"] == 0
@@ -0,0 +1,180 @@
+"""Replay recorder history through the Extend Switch decoder to tune it offline.
+
+Reads the state changes of the source switches from the SQLite database of the
+Home Assistant recorder, runs them through the decoder of ExtendSwitch in
+virtual time for every candidate push_wait_time and push_max, and reports how
+the gestures would have been counted.
+
+A window is ambiguous when the next press came within --margin of the moment
+it closed: a slightly slower or faster press would have given another count.
+
+Usage:
+    python tools/replay.py home-assistant_v2.db 'switch.*' --wait 300,500,800 --max 2,3,5
+"""
+import argparse
+import fnmatch
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# decoder.py has no Home Assistant imports, load it without the package
+_spec = importlib.util.spec_from_file_location("decoder", os.path.join(
+    os.path.dirname(__file__), "..", "custom_components", "extend_switch", "decoder.py"))
+decoder = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(decoder)
+
+_TOGGLE_STATES = ("on", "off")
+
+
+def read_entity_ids(db, patterns):
+    """Return the recorded entity ids matching one of the fnmatch patterns."""
+    rows = db.execute("SELECT entity_id FROM states_meta")
+    return sorted(entity_id for entity_id, in rows
+                  if any(fnmatch.fnmatchcase(entity_id, pattern) for pattern in patterns))
+
+
+def read_toggles(db, entity_id, since=None):
+    """Return the (timestamp, state) on/off changes of entity_id, oldest first.
+
+    Like the live listener, a change only counts when both the old and the new
+    state are on or off, so on -> unavailable -> off is not a toggle.
+    """
+    query = (
+        "SELECT s.state, COALESCE(s.last_changed_ts, s.last_updated_ts) "
+        "FROM states s JOIN states_meta m ON s.metadata_id = m.metadata_id "
+        "WHERE m.entity_id = ?")
+    args = [entity_id]
+    if since is not None:
+        query += " AND s.last_updated_ts >= ?"
+        args.append(since)
+    query += " ORDER BY s.last_updated_ts"
+
+    toggles = []
+    previous = None
+    for state, changed_at in db.execute(query, args):
+        if state != previous and state in _TOGGLE_STATES and previous in _TOGGLE_STATES:
+            toggles.append((changed_at, state))
+        previous = state
+    return toggles
+
+
+def replay(source, toggles, push_wait_time, push_max, adaptive=False,
+           push_wait_min=250, debounce_time=0, margin=0.1):
+    """Count the gestures of toggles with one configuration, as ExtendSwitch would.
+
+    The recorder keeps no trace of which changes were our own turn offs, the
+    change following a gesture that left the source on is taken as its echo.
+    """
+    switch = decoder.SwitchDecoder(source)
+    switch.configure(push_wait_time, push_max, push_wait_min=push_wait_min, adaptive=adaptive,
+                     debounce_time=debounce_time)
+    counts = [0] * (push_max + 1)
+    ambiguous = 0
+    echoes = 0
+    bounces = 0
+    echo = False
+
+    for pressed_at, state in toggles:
+        late = None
+        if switch.push_count:
+            window = switch.window
+            late = pressed_at - switch.presses.latest - window
+            if late > 0:
+                counts[switch.commit()] += 1
+                # the window closed while the source was on, it was turned off
+                echo = switch.source_state == "on"
+        switch.source_state = state
+        if echo:
+            # our turn off lands just after the window, it is no press and not ambiguous
+            echo = False
+            echoes += 1
+            continue
+        if switch.bounced(pressed_at):
+            bounces += 1
+            continue
+        if late is not None and -margin * window <= late <= margin * window:
+            ambiguous += 1
+        switch.press(pressed_at)
+        if switch.complete:
+            counts[switch.commit()] += 1
+            echo = state == "on"
+    if switch.push_count:
+        counts[switch.commit()] += 1
+
+    return {
+        "source": source,
+        "push_wait_time": push_wait_time,
+        "push_max": push_max,
+        "adaptive": adaptive,
+        "toggles": len(toggles),
+        "presses": switch.presses.count,
+        "echoes": echoes,
+        "bounces": bounces,
+        "gestures": sum(counts),
+        "counts": {count: n for count, n in enumerate(counts) if n},
+        "at_max": counts[push_max],
+        "ambiguous": ambiguous,
+    }
+
+
+def _ints(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("database", help="recorder SQLite database, opened read only")
+    parser.add_argument("entities", nargs="+", help="source entity ids, fnmatch patterns allowed")
+    parser.add_argument("--wait", type=_ints, default=[300, 500, 750, 1000],
+                        help="candidate push_wait_time values in ms (default 300,500,750,1000)")
+    parser.add_argument("--max", type=_ints, default=[3, 5],
+                        help="candidate push_max values (default 3,5)")
+    parser.add_argument("--adaptive", action="store_true", help="also replay the adaptive window")
+    parser.add_argument("--debounce", type=int, default=0,
+                        help="debounce_time in ms, changes closer to the previous press are dropped")
+    parser.add_argument("--days", type=float, help="only the last DAYS of history")
+    parser.add_argument("--margin", type=float, default=0.1,
+                        help="part of the window a press is ambiguous within (default 0.1)")
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args(argv)
+
+    db = sqlite3.connect("file:{}?mode=ro".format(args.database), uri=True)
+    since = time.time() - args.days * 86400 if args.days else None
+    entity_ids = read_entity_ids(db, args.entities)
+    if not entity_ids:
+        parser.error("no recorded entity matches {}".format(", ".join(args.entities)))
+
+    events = 0
+    started = time.perf_counter()
+    for entity_id in entity_ids:
+        toggles = read_toggles(db, entity_id, since)
+        results = []
+        for wait in args.wait:
+            for push_max in args.max:
+                for adaptive in (False, True) if args.adaptive else (False,):
+                    results.append(replay(entity_id, toggles, wait, push_max,
+                                          adaptive=adaptive, debounce_time=args.debounce,
+                                          margin=args.margin))
+                    events += len(toggles)
+        if args.json:
+            for result in results:
+                print(json.dumps(result))
+            continue
+        best = min(results, key=lambda result: result["ambiguous"]) if toggles else None
+        print("{} : {} toggles".format(entity_id, len(toggles)))
+        for result in results:
+            print("  {} wait {:>5} max {:>2}{}  gestures {:>6}  ambiguous {:>5}  at max {:>5}"
+                  "  counts {}".format(
+                      "*" if result is best else " ", result["push_wait_time"],
+                      result["push_max"], " adaptive" if result["adaptive"] else "",
+                      result["gestures"], result["ambiguous"], result["at_max"],
+                      " ".join("{}:{}".format(*item) for item in result["counts"].items())))
+    elapsed = time.perf_counter() - started
+    print("replayed {} events in {:.3f} s".format(events, elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()